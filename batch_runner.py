@@ -0,0 +1,271 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+import dedup
+import fetcher
+import metrics
+import scrapper
+import summarizer
+import tiered_fetch
+
+queue_size = 16
+fetch_workers = 8
+extract_workers = 2
+
+_DONE = object()
+
+
+def record_id(record) -> str:
+    if record.get("id"):
+        return str(record["id"])
+    source = record.get("url") or record.get("text") or ""
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+
+def read_records(path):
+    # JSONL z polami "url" albo "text"; zwykłe linie (np. benchmark.txt: "1) https://...") traktujemy jako URL
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("oczekiwano obiektu JSON")
+                except ValueError as e:
+                    # Uszkodzona linia trafia do wyników jako błąd, reszta pliku jest przetwarzana dalej
+                    yield {"id": record_id({"text": line}), "error": f"linia {number}: niepoprawny JSON ({e})"}
+                    continue
+            else:
+                record = {"url": re.sub(r'^\d+\)\s*', '', line)}
+            if record.get("url") or record.get("text"):
+                record["id"] = record_id(record)
+                yield record
+
+
+def completed_ids(path, retry_errors=False):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # Ostatnia linia mogła zostać ucięta przy awarii
+                continue
+            if retry_errors and result.get("error"):
+                continue
+            done.add(result["id"])
+    return done
+
+
+class Stage:
+    """Etap potoku: `workers` wątków czyta z `inbox`, przetwarza i przekazuje dalej do `outbox`.
+
+    Rekord z ustawionym polem "error" przechodzi przez kolejne etapy bez przetwarzania.
+    """
+
+    def __init__(self, name, fn, inbox, outbox, workers=1):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self._alive = workers
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True).start()
+        return self
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                self.inbox.put(_DONE)
+                break
+            if not item.get("error"):
+                started = time.perf_counter()
+                try:
+                    self.fn(item)
+                except Exception as e:
+                    item["error"] = f"{self.name}: {e}"
+                item["timings"][self.name] = time.perf_counter() - started
+            self.outbox.put(item)
+
+        with self._lock:
+            self._alive -= 1
+            if self._alive == 0:
+                self.outbox.put(_DONE)
+
+
+def fetch_stage(item):
+    if item.get("text"):
+        return
+    if scrapper.fetch_mode == "static":
+        item["html"] = fetcher.fetch(item["url"])
+        if item["html"] is None:
+            raise RuntimeError("nie udało się pobrać strony")
+    else:
+        item["raw_text"] = scrapper.scrape_text_from_url(item["url"])
+
+
+def extract_stage(item):
+    if "html" in item:
+        item["raw_text"] = scrapper.extract_text(item["url"], item.pop("html"))
+    elif item.get("text"):
+        item["raw_text"] = item["text"]
+    scraped = item.get("raw_text")
+    if isinstance(scraped, (list, tuple)):
+        item["raw_text"] = " ".join(s for s in scraped if s)
+
+
+def sanitize_stage(item):
+    item["clean_text"] = summarizer.sanitize_text((item.pop("raw_text", None) or "").strip())
+    if not item["clean_text"]:
+        raise ValueError("Brak tekstu do streszczenia.")
+
+
+def make_summarize_stage(model_name, max_length, min_length, generate=None):
+    def summarize_stage(item):
+        cached = summarizer.cached_document_summary(item["clean_text"], model_name, max_length, min_length)
+        if cached is not None:
+            item["summary"] = cached
+            return
+        item["chunk_summaries"] = summarizer.summarize_text_chunks(item["clean_text"], model_name, generate=generate)
+    return summarize_stage
+
+
+def make_rank_stage(model_name, max_length, min_length):
+    def rank_stage(item):
+        if "summary" in item:
+            return
+        item["summary"] = summarizer.combine_summaries(item.pop("chunk_summaries"), max_length, min_length)
+        summarizer.store_document_summary(item["clean_text"], model_name, max_length, min_length, item["summary"])
+    return rank_stage
+
+
+def run(records, output_path, model_name, max_length, min_length, retry_errors=False, workers=None, pool=None):
+    # Z pulą procesów (worker_pool) kilka dokumentów jest w toku naraz, a ich partie chunków
+    # liczą procesy robocze
+    generate = pool.generator(model_name) if pool else None
+    skip = completed_ids(output_path, retry_errors)
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(6)]
+    stages = [
+        Stage("fetch", fetch_stage, queues[0], queues[1], workers or fetch_workers),
+        Stage("extract", extract_stage, queues[1], queues[2], extract_workers),
+        Stage("sanitize", sanitize_stage, queues[2], queues[3]),
+        Stage("summarize", make_summarize_stage(model_name, max_length, min_length, generate), queues[3], queues[4],
+              pool.workers if pool else 1),
+        Stage("rank", make_rank_stage(model_name, max_length, min_length), queues[4], queues[5]),
+    ]
+    for stage in stages:
+        stage.start()
+
+    def feed():
+        try:
+            for record in records:
+                if record["id"] in skip:
+                    continue
+                record["timings"] = {}
+                record["started"] = time.perf_counter()
+                queues[0].put(record)
+        finally:
+            # Także po błędzie czytania, inaczej run() czekałby na wyniki w nieskończoność
+            queues[0].put(_DONE)
+
+    threading.Thread(target=feed, name="reader", daemon=True).start()
+
+    written = failed = 0
+    with open(output_path, "a", encoding="utf-8") as out:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            result = {
+                "id": item["id"],
+                "url": item.get("url"),
+                "model_name": model_name,
+                "text_length": len(item.get("clean_text", "")),
+                "summary": item.get("summary"),
+                "error": item.get("error"),
+                "elapsed_s": time.perf_counter() - item["started"],
+                "timings": item["timings"],
+            }
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            written += 1
+            failed += bool(result["error"])
+            print(f"[{written}] {result['id']} {'BŁĄD: ' + result['error'] if result['error'] else 'OK'}",
+                  file=sys.stderr)
+
+    return {"written": written, "failed": failed, "skipped": len(skip)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wsadowe streszczanie artykułów z pliku JSONL")
+    parser.add_argument("input", help="JSONL z polami url/text (lub lista URL-i, jeden w linii)")
+    parser.add_argument("output", help="wynikowy JSONL; istniejące rekordy są pomijane")
+    parser.add_argument("--model", default=summarizer.polish_models[0])
+    parser.add_argument("--max-length", type=int, default=2000)
+    parser.add_argument("--min-length", type=int, default=1500)
+    parser.add_argument("--fetch-workers", type=int, default=fetch_workers)
+    parser.add_argument("--static", action="store_true", help="pobieraj strony bez Playwrighta")
+    parser.add_argument("--browser", action="store_true", help="pobieraj każdą stronę przez Playwrighta")
+    parser.add_argument("--workers", type=int, help="streszczaj w tylu procesach ze wspólnymi wagami modelu")
+    parser.add_argument("--retry-errors", action="store_true", help="ponów rekordy zakończone błędem")
+    parser.add_argument("--no-cache", action="store_true", help="nie używaj cache streszczeń")
+    parser.add_argument("--metrics", help="zapisuj czasy etapów do pliku .jsonl lub .csv")
+    parser.add_argument("--metrics-port", type=int, help="wystaw endpoint /metrics (Prometheus) na tym porcie")
+    args = parser.parse_args(argv)
+
+    if args.metrics or args.metrics_port:
+        metrics.enabled = True
+    if args.metrics:
+        metrics.add_sink(metrics.CsvSink(args.metrics) if args.metrics.endswith(".csv")
+                         else metrics.JsonlSink(args.metrics))
+    if args.metrics_port:
+        metrics.serve_metrics(args.metrics_port)
+
+    if args.static:
+        scrapper.fetch_mode = "static"
+    elif args.browser:
+        scrapper.fetch_mode = "browser"
+    if args.no_cache:
+        summarizer.use_cache = False
+
+    pool = None
+    if args.workers:
+        import worker_pool
+        pool = worker_pool.WorkerPool([args.model], args.workers)
+        # Proces główny tylko tnie tekst na chunki, ale też korzysta ze zmapowanych wag
+        worker_pool.install_shared([args.model])
+    try:
+        stats = run(read_records(args.input), args.output, args.model, args.max_length, args.min_length,
+                    args.retry_errors, args.fetch_workers, pool)
+    finally:
+        if pool:
+            pool.close()
+    print(f"Zapisano {stats['written']} (błędy: {stats['failed']}), pominięto {stats['skipped']}",
+          file=sys.stderr)
+    if scrapper.fetch_mode == "tiered" and tiered_fetch.get_tiers().shares(session=True)[1]:
+        print(f"Pobieranie: {tiered_fetch.get_tiers().report(session=True)}", file=sys.stderr)
+    if summarizer.use_cache:
+        print(f"Cache streszczeń: {summarizer.get_cache().stats()}", file=sys.stderr)
+        if dedup.enabled:
+            print(f"Prawie-duplikaty: {dedup.get_index().stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Benchmark całego potoku na zapisanych stronach HTML (bez sieci).
+
+Uruchomienie z katalogu głównego repozytorium:
+
+    python -m benchmarks.bench --tiny                 # małe losowe modele, sam CPU
+    python -m benchmarks.bench --model facebook/bart-large-cnn
+    python -m benchmarks.bench --tiny --update-baseline
+
+Każdy etap (scrape, sanitize, chunking, translation, generation, mmr) mierzony jest osobno;
+wynik porównywany jest z zapisaną linią bazową, a regresje kończą proces kodem 1. Tłumaczenie
+liczy się tylko dla modeli z pivotem przez angielski: wywołania tłumacza wewnątrz pipeline'u
+(spany "translate") są odejmowane od generacji i dopisywane do etapu translation.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import metrics  # noqa: E402
+import scrapper  # noqa: E402
+import summarizer  # noqa: E402
+from chunking import iter_chunks  # noqa: E402
+from ranking import get_embedder, select_summaries  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+FIXTURE_URLS = {
+    "tvpinfo.html": "https://www.tvp.info/00000000/fixture",
+    "sportowefakty.html": "https://sportowefakty.wp.pl/pilka-reczna/0/fixture",
+    "generic.html": "https://businessinsider.com.pl/gospodarka/fixture",
+}
+STAGES = ["scrape", "sanitize", "chunking", "translation", "generation", "mmr"]
+baseline_path = os.path.join(ROOT, "benchmarks", "baseline.json")
+tolerance = 0.25
+min_regression_s = 0.005
+
+
+def load_fixtures():
+    fixtures = {}
+    for name, url in FIXTURE_URLS.items():
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            fixtures[name] = (url, f.read())
+    return fixtures
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimer:
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+
+def translation_totals():
+    snapshot = metrics.snapshot()
+    return (snapshot["timings"].get("translate", {}).get("total_s", 0.0),
+            snapshot["counters"].get("translate_input_tokens", 0))
+
+
+def run_once(fixtures, model_name):
+    timer = StageTimer()
+    counters = defaultdict(int)
+    summarize, tokenizer = summarizer.get_pipeline(model_name)
+    pivot = model_name not in summarizer.polish_models
+
+    for url, html in fixtures.values():
+        with timer.stage("scrape"):
+            text = scrapper.extract_text(url, html) or ""
+
+        with timer.stage("sanitize"):
+            text = summarizer.sanitize_text(text)
+
+        with timer.stage("chunking"):
+            chunks = list(iter_chunks(text, tokenizer, model_name))
+        texts = [chunk for chunk, _ in chunks]
+        counters["input_tokens"] += sum(n for _, n in chunks)
+        counters["chunks"] += len(chunks)
+
+        translated_s, translated_tokens = translation_totals()
+        with timer.stage("generation"):
+            summaries = summarizer.summarize_chunks(summarize, tokenizer, texts,
+                                                    token_counts=[n for _, n in chunks])
+        counters["generated_tokens"] += sum(summarizer.count_tokens(tokenizer, s) for s in summaries)
+        if pivot:
+            seconds, tokens = translation_totals()
+            timer.seconds["generation"] -= seconds - translated_s
+            timer.seconds["translation"] += seconds - translated_s
+            counters["translated_tokens"] += tokens - translated_tokens
+
+        # Limit poniżej długości połączonych streszczeń, żeby etap MMR zawsze się wykonał
+        budget = max(1, len(" ".join(summaries)) * 2 // 5)
+        with timer.stage("mmr"):
+            select_summaries(summaries, budget, budget * 3 // 4)
+
+    return timer.seconds, counters
+
+
+def run(model_name, repeat, tiny):
+    fixtures = load_fixtures()
+
+    start = time.perf_counter()
+    if tiny:
+        from benchmarks import tiny_models
+        texts = [scrapper.extract_text(url, html) or "" for url, html in fixtures.values()]
+        tiny_models.install(texts, [model_name])
+    # Spany "translate" rozdzielają czas tłumaczenia i generacji w modelach z pivotem
+    metrics.enabled = True
+    summarizer.get_pipeline(model_name)
+    get_embedder()
+    model_load = time.perf_counter() - start
+
+    runs = [run_once(fixtures, model_name) for _ in range(repeat)]
+    stages = {name: statistics.median(seconds[name] for seconds, _ in runs) for name in STAGES}
+    counters = runs[0][1]
+
+    return {
+        "model_name": model_name,
+        "tiny": tiny,
+        "repeat": repeat,
+        "model_load_s": model_load,
+        "stages_s": stages,
+        "total_s": sum(stages.values()),
+        "counters": dict(counters),
+        "generation_tokens_per_s": counters["generated_tokens"] / stages["generation"] if stages["generation"] else 0.0,
+        "translation_tokens_per_s": counters["translated_tokens"] / stages["translation"] if stages["translation"] else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def baseline_key(report):
+    return ("tiny:" if report["tiny"] else "") + report["model_name"]
+
+
+def compare(report, baseline):
+    regressions = []
+    for name, seconds in report["stages_s"].items():
+        base = baseline.get("stages_s", {}).get(name)
+        if base is None:
+            continue
+        if seconds > base * (1 + tolerance) and seconds - base > min_regression_s:
+            regressions.append(f"{name}: {base:.4f} s -> {seconds:.4f} s ({seconds / base - 1:+.0%})")
+    base_rss = baseline.get("peak_rss_mb")
+    if base_rss and report["peak_rss_mb"] > base_rss * (1 + tolerance):
+        regressions.append(f"peak_rss: {base_rss:.0f} MB -> {report['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def print_report(report, baseline):
+    print(f"Model: {report['model_name']}{' (tiny)' if report['tiny'] else ''}, powtórzenia: {report['repeat']}")
+    print(f"  {'model_load':<12} {report['model_load_s']:9.4f} s")
+    for name, seconds in report["stages_s"].items():
+        base = baseline.get("stages_s", {}).get(name) if baseline else None
+        delta = f"  (linia bazowa {base:.4f} s, {seconds / base - 1:+.0%})" if base else ""
+        print(f"  {name:<12} {seconds:9.4f} s{delta}")
+    print(f"  {'razem':<12} {report['total_s']:9.4f} s")
+    print(f"  generacja: {report['generation_tokens_per_s']:.1f} tok/s, "
+          f"tłumaczenie: {report['translation_tokens_per_s']:.1f} tok/s, "
+          f"szczytowy RSS: {report['peak_rss_mb']:.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=summarizer.polish_models[0])
+    parser.add_argument("--tiny", action="store_true", help="małe losowe modele zamiast prawdziwych wag")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="zapisz pełny raport do pliku JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args.model, args.repeat, args.tiny)
+
+    baselines = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            baselines = json.load(f)
+    baseline = baselines.get(baseline_key(report))
+
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baselines[baseline_key(report)] = report
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Zapisano linię bazową do {baseline_path}")
+        return 0
+
+    regressions = compare(report, baseline) if baseline else []
+    for regression in regressions:
+        print("REGRESJA:", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Prawie-duplikaty: trafność indeksu LSH, odsetek duplikatów w symulowanym feedzie i czas wyszukiwania.
+
+    python -m benchmarks.bench_dedup
+    python -m benchmarks.bench_dedup --background 20000 --threshold 0.7
+
+Feed budowany jest z fikstur: oryginały, przedruki (dopisek agencji), lekko zredagowane kopie
+(podmienione słowa, usunięte zdanie), mocno skrócone wersje i teksty niezwiązane. Indeks
+zawiera dodatkowo --background losowych dokumentów. Dla każdego zapytania dokładny
+współczynnik Jaccarda shingli porównywany jest z decyzją indeksu (precyzja i czułość), a czas
+wyszukiwania przez LSH z liniowym porównaniem ze wszystkimi sygnaturami. Na koniec sprawdzane
+jest, że summarizer.cached_document_summary zwraca dla przedruku streszczenie oryginału.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dedup  # noqa: E402
+import scrapper  # noqa: E402
+import summary_cache  # noqa: E402
+import summarizer  # noqa: E402
+import textrank  # noqa: E402
+from benchmarks.bench import load_fixtures  # noqa: E402
+
+SCOPE = "bench"
+
+
+def jaccard(text1, text2):
+    a, b = dedup.shingles(text1), dedup.shingles(text2)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def edit_words(text, fraction, rng):
+    words = text.split()
+    for i in rng.sample(range(len(words)), int(len(words) * fraction)):
+        words[i] = words[i][::-1]
+    return " ".join(words)
+
+
+def drop_sentences(text, fraction, rng):
+    sentences = textrank.split_sentences(text)
+    keep = sorted(rng.sample(range(len(sentences)), max(1, round(len(sentences) * (1 - fraction)))))
+    return " ".join(sentences[i] for i in keep)
+
+
+def variants(text, rng):
+    return {
+        "przedruk": f"(PAP) {text} Źródło: PAP.",
+        "lekka redakcja": edit_words(drop_sentences(text, 0.05, rng), 0.01, rng),
+        "redakcja": edit_words(text, 0.03, rng),
+        "skrót 50%": drop_sentences(text, 0.5, rng),
+    }
+
+
+def random_document(vocabulary, rng, words=400):
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--background", type=int, default=5000, help="losowe dokumenty w indeksie")
+    parser.add_argument("--threshold", type=float, default=dedup.threshold)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--margin", type=float, default=0.05, help="tolerowana pomyłka wokół progu")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    originals = [summarizer.sanitize_text(scrapper.extract_text(url, html) or "")
+                 for url, html in load_fixtures().values()]
+    vocabulary = sorted({w for text in originals for w in text.split()})
+    workdir = tempfile.mkdtemp(prefix="bench_dedup_")
+    index = dedup.DedupIndex(os.path.join(workdir, "dedup.sqlite"), args.threshold)
+    print(f"Próg: {index.threshold}, LSH: {index.bands} pasm x {index.rows} wierszy, "
+          f"tło: {args.background} dokumentów")
+
+    start = time.perf_counter()
+    background = [random_document(vocabulary, rng) for _ in range(args.background)]
+    for i, text in enumerate(background):
+        index.add(text, SCOPE, f"background-{i}")
+    for i, text in enumerate(originals):
+        index.add(text, SCOPE, f"original-{i}")
+    print(f"  budowa indeksu: {(time.perf_counter() - start) / (len(background) + len(originals)) * 1000:.2f} ms/dok")
+
+    queries = []
+    for i, text in enumerate(originals):
+        for kind, variant in variants(text, rng).items():
+            queries.append((kind, variant, f"original-{i}", jaccard(text, variant)))
+    for _ in range(len(originals) * 2):
+        queries.append(("niezwiązany", random_document(vocabulary, rng), None, 0.0))
+
+    all_keys = [f"background-{i}" for i in range(len(background))] + [f"original-{i}" for i in range(len(originals))]
+    all_signatures = np.stack([dedup.signature(dedup.shingles(t)) for t in background + originals])
+
+    tp = fp = fn = tn = 0
+    # Tuż przy progu MinHash myli się w obie strony; błędem benchmarku są tylko pomyłki poza margin
+    clear_errors = 0
+    lsh_times, scan_times = [], []
+    print(f"  {'rodzaj':<16} {'Jaccard':>8} {'szac.':>6}  wynik")
+    for kind, text, expected, true_j in queries:
+        start = time.perf_counter()
+        found = index.lookup(text, SCOPE)
+        lsh_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sig = dedup.signature(dedup.shingles(text))
+        scores = (all_signatures == sig).mean(axis=1)
+        best = int(scores.argmax())
+        scan_times.append(time.perf_counter() - start)
+
+        is_dup = true_j >= index.threshold
+        hit = found is not None and found[1] == expected
+        tp += is_dup and hit
+        fn += is_dup and not hit
+        fp += not is_dup and found is not None
+        tn += not is_dup and found is None
+        clear_errors += abs(true_j - index.threshold) > args.margin and is_dup != (found is not None)
+        estimate = found[0] if found else scores[best] if all_keys[best] == expected else 0.0
+        print(f"  {kind:<16} {true_j:8.2f} {estimate:6.2f}  {'duplikat' if found else '-'}")
+
+    stats = index.stats()
+    print(f"  precyzja: {tp / (tp + fp) if tp + fp else 1.0:.2f}, czułość: {tp / (tp + fn) if tp + fn else 1.0:.2f}, "
+          f"odsetek duplikatów w feedzie: {stats['dedup_ratio']:.0%}, częściowe: {stats['partial']}")
+    print(f"  wyszukiwanie LSH: średnio {statistics.mean(lsh_times) * 1000:.2f} ms, "
+          f"p95 {sorted(lsh_times)[int(0.95 * (len(lsh_times) - 1))] * 1000:.2f} ms; "
+          f"skan liniowy: {statistics.mean(scan_times) * 1000:.2f} ms")
+
+    summarizer.use_cache = True
+    summary_cache._default_cache = summary_cache.SummaryCache(os.path.join(workdir, "summaries.sqlite"))
+    dedup._default_index = index
+    model = summarizer.polish_models[0]
+    summarizer.store_document_summary(originals[0], model, 2000, 200, "streszczenie oryginału")
+    reused = summarizer.cached_document_summary(f"(PAP) {originals[0]} Źródło: PAP.", model, 2000, 200)
+    if reused != "streszczenie oryginału":
+        raise AssertionError("cached_document_summary nie zwróciło streszczenia oryginału dla przedruku")
+    print("  summarizer: przedruk dostaje streszczenie oryginału z cache")
+    if clear_errors:
+        print(f"  BŁĄD: {clear_errors} pomyłek dalej niż {args.margin} od progu")
+    return 1 if clear_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
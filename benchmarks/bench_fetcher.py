@@ -0,0 +1,95 @@
+"""Warstwa pobierania offline: lokalny serwer fikstur zamiast prawdziwych stron.
+
+    python -m benchmarks.bench_fetcher
+
+Sprawdza na benchmarks.fixture_server (ETag, Last-Modified, 304): pobranie i zapis w cache,
+rewalidację (304 zwraca treść z cache), pobranie zmienionej strony, starą kopię z cache przy
+niedostępnym serwerze, odstęp między żądaniami do jednego hosta (równolegle do różnych
+hostów bez czekania) oraz przycinanie cache HTML. Kończy się kodem 1 przy pierwszym błędzie.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fetcher  # noqa: E402
+from benchmarks import fixture_server  # noqa: E402
+from benchmarks.bench import FIXTURES_DIR  # noqa: E402
+
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+    print(f"  ok: {message}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host-interval", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=6, help="żądania do jednego hosta w teście odstępów")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_fetcher_")
+    pages = os.path.join(workdir, "pages")
+    shutil.copytree(FIXTURES_DIR, pages)
+    server, base_url = fixture_server.start(root=pages)
+    port = server.server_address[1]
+    cache = fetcher.HtmlCache(os.path.join(workdir, "html"))
+    client = fetcher.Fetcher(cache=cache, host_interval=0)
+    url = f"{base_url}/generic.html"
+
+    try:
+        with open(os.path.join(pages, "generic.html"), "rb") as f:
+            original = f.read()
+        check(client.fetch(url) == original and client.stats["downloaded"] == 1, "pierwsze pobranie zapisane w cache")
+        check(client.fetch(url) == original and client.stats["not_modified"] == 1, "rewalidacja: 304 i treść z cache")
+
+        changed = original.replace(b"</body>", "<p>Aktualizacja artykułu.</p></body>".encode("utf-8"))
+        with open(os.path.join(pages, "generic.html"), "wb") as f:
+            f.write(changed)
+        os.utime(os.path.join(pages, "generic.html"), (time.time() + 5, time.time() + 5))
+        check(client.fetch(url) == changed and client.stats["downloaded"] == 2, "zmieniona strona pobrana od nowa")
+
+        spaced = fetcher.Fetcher(cache=None, host_interval=args.host_interval)
+        same_host = [f"{base_url}/tvpinfo.html?{i}" for i in range(args.requests)]
+        start = time.perf_counter()
+        spaced.fetch_many(same_host, workers=args.requests)
+        elapsed = time.perf_counter() - start
+        expected = (args.requests - 1) * args.host_interval
+        check(elapsed >= expected * 0.95, f"{args.requests} żądań do jednego hosta: {elapsed:.2f} s (min. {expected:.2f} s)")
+
+        spaced = fetcher.Fetcher(cache=None, host_interval=args.host_interval)
+        two_hosts = [f"http://{host}:{port}/tvpinfo.html?{i}"
+                     for i in range(args.requests // 2) for host in ("127.0.0.1", "localhost")]
+        start = time.perf_counter()
+        spaced.fetch_many(two_hosts, workers=len(two_hosts))
+        elapsed = time.perf_counter() - start
+        check(elapsed < expected, f"te same żądania rozłożone na dwa hosty: {elapsed:.2f} s")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    fetcher.max_retries = 0
+    offline = fetcher.Fetcher(cache=cache, session=fetcher.make_session(), host_interval=0)
+    check(offline.fetch(url) == changed and offline.stats["stale"] == 1, "serwer niedostępny: stara kopia z cache")
+    check(offline.fetch(f"{base_url}/sportowefakty.html") is None and offline.stats["errors"] == 1,
+          "serwer niedostępny, brak w cache: None")
+
+    for i in range(20):
+        cache.put(f"https://example.com/{i}", original + str(i).encode("ascii"), {})
+    limit = 5 * len(original)
+    removed = cache.prune(limit)
+    check(cache.size_bytes() <= limit and removed >= 15, f"przycinanie cache: usunięto {removed} stron")
+    check(cache.get("https://example.com/19") is not None and cache.get("https://example.com/0") is None,
+          "zostają ostatnio zapisane strony")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Czas startu: import modułów aplikacji i scrapowanie zapisanego HTML, każdy w świeżym procesie.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --repeat 5 --budget 1.0
+
+W procesie potomnym połączenia sieciowe są blokowane, więc wynik pokazuje też, czy start działa
+offline. Zgłaszane są ciężkie biblioteki załadowane już przy imporcie; przekroczenie budżetu
+czasu, ciężki import albo próba połączenia kończą proces kodem 1.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "playwright", "nltk", "scipy",
+                 "morfeusz2", "readability"]
+
+# Kod wykonywany w procesie potomnym; {body} mierzy się od startu interpretera do końca
+CHILD = """
+import json, socket, sys, time
+start = time.perf_counter()
+attempts = []
+def _blocked(self, address, *args, **kwargs):
+    attempts.append(str(address))
+    raise OSError("sieć zablokowana w bench_import")
+socket.socket.connect = _blocked
+sys.path.insert(0, {root!r})
+{body}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy, "network": attempts}}))
+"""
+
+SCENARIOS = {
+    "gui": "import gui",
+    "scrapper (statyczny HTML)": """
+import scrapper
+from benchmarks.bench import load_fixtures
+scrapper.fetch_mode = "static"
+for url, html in load_fixtures().values():
+    scrapper.extract_text(url, html)
+""",
+    "summarizer": "import summarizer",
+    "server": "import server",
+    "batch_runner": "import batch_runner",
+}
+# Tu ciężkie biblioteki nie mogą się pojawić przed pierwszym użyciem modelu
+STRICT = {"gui", "scrapper (statyczny HTML)"}
+
+
+def run_child(body):
+    code = CHILD.format(root=ROOT, body=body, heavy=HEAVY_MODULES)
+    env = dict(os.environ, HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "błąd procesu")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0, help="maksymalny czas startu [s]")
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"  {'scenariusz':<28} {'mediana [s]':>11}  ciężkie moduły / sieć")
+    for name, body in SCENARIOS.items():
+        runs = [run_child(body) for _ in range(args.repeat)]
+        seconds = statistics.median(r["seconds"] for r in runs)
+        heavy, network = runs[-1]["heavy"], runs[-1]["network"]
+        problems = []
+        if seconds > args.budget:
+            problems.append(f"ponad {args.budget:.1f} s")
+        if heavy and name in STRICT:
+            problems.append("ciężki import")
+        if network:
+            problems.append(f"połączenie: {network[0]}")
+        failed = failed or bool(problems)
+        print(f"  {name:<28} {seconds:11.3f}  {', '.join(heavy) or '-'} / {'tak' if network else 'nie'}"
+              f"{'  <- ' + '; '.join(problems) if problems else ''}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Normalizator tekstu kontra dawne wyrażenia regularne z sanitize_text.
+
+    python -m benchmarks.bench_normalizer
+    python -m benchmarks.bench_normalizer --cases 20000 --seed 7 --max-mb 8
+
+Najpierw losowe porównanie wyników (teksty budowane ze "złośliwego" słownika: powtórzenia
+różniące się wielkością liter, prefiksy, domeny, URL-e, e-maile, różne białe znaki), potem
+czasy na artykułach z fikstur i kilkumegabajtowych patologicznych wejściach. Stara wersja
+mierzona jest tylko do --legacy-cap znaków, bo jej czas rośnie kwadratowo. Na zwykłych
+artykułach regexy są ok. 1,7x szybsze: to świadoma cena za brak kwadratowych przypadków
+(np. krótkie tokeny z kropkami i myślnikami, na których regexy są wielokrotnie wolniejsze).
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import normalizer  # noqa: E402
+import scrapper  # noqa: E402
+from benchmarks.bench import load_fixtures  # noqa: E402
+
+
+def legacy_sanitize(text):
+    text = re.sub(r'https?://\S+|www\.\S+', ' ', text)
+    text = re.sub(r'\S+@\S+', ' ', text)
+    text = re.sub(r'(\b[\w\-.]+(?:\.[a-z]{2,})(?:\.[a-z]{2,})*\b)(?:\s+\1)+', r'\1', text, flags=re.IGNORECASE)
+    text = re.sub(r'(\b\w+\b(?:\s+\b\w+\b))(?:\s+\1){2,}', r'\1', text)
+    text = re.sub(r'\b(\w+)(?:\s+\1){2,}', r'\1', text, flags=re.IGNORECASE)
+    return ' '.join(text.split())
+
+
+def legacy_collapse(text):
+    text = re.sub(r'(\b\w+\b(?:\s+\b\w+\b))(?:\s+\1){2,}', r'\1', text)
+    return re.sub(r'\b(\w+)(?:\s+\1){2,}', r'\1', text, flags=re.IGNORECASE)
+
+
+VOCABULARY = [
+    "ala", "Ala", "ALA", "alab", "al", "ma", "Ma", "kota", "kot", "kotа", "_", "a_b", "12", "2024",
+    "żółć", "Żółć", "ŻÓŁĆ", "łódź", "Łódź", "İstanbul", "istanbul", "ıi", "ſs", "ΟΣ", "οσ", "ος", "K",
+    "onet.pl", "Onet.PL", "onet.plx", "www.onet.pl", "wp.pl", "sport.wp.pl", "x.wp.pl", "a-b.co.uk",
+    "A-B.CO.UK", "-", ".", "..", "a.", ".pl", "a.b", "a.bc", "a.b1", "1.23", "http://", "http://x",
+    "https://a.pl/b", "xhttp://y", "www.", "www.a", "a@b", "@a", "a@", "@", "jan@wp.pl", "ala,", ",ala",
+    "(ala)", "ala.", "Ala!", "kota.", "wp.pl,", "Czytaj", "więcej", "Czytaj więcej", "Reklama",
+]
+SPACES = [" ", " ", " ", "  ", "\t", "\n", " \n ", " ", "\r\n"]
+
+
+def random_text(rng, max_tokens=30):
+    tokens = []
+    while len(tokens) < rng.randint(1, max_tokens):
+        roll = rng.random()
+        if roll < 0.35 and tokens:
+            # Powtórzenie jednego lub kilku poprzednich słów, czasem innymi literami
+            width = rng.choice([1, 1, 2, 2, 3])
+            unit = tokens[-width:]
+            for _ in range(rng.randint(1, 4)):
+                tokens.extend(w.upper() if rng.random() < 0.2 else w for w in unit)
+        elif roll < 0.45:
+            tokens.append(rng.choice(VOCABULARY) + rng.choice(VOCABULARY))
+        else:
+            tokens.append(rng.choice(VOCABULARY))
+    glue = [rng.choice(SPACES) for _ in tokens]
+    if rng.random() < 0.3:
+        glue = [glue[0]] * len(tokens)
+    text = "".join(t + g for t, g in zip(tokens, glue))
+    return text if rng.random() < 0.5 else rng.choice(SPACES) + text.rstrip()
+
+
+def check_equivalence(cases, seed):
+    rng = random.Random(seed)
+    for i in range(cases):
+        text = random_text(rng)
+        expected, actual = legacy_sanitize(text), normalizer.normalize(text)
+        if expected != actual:
+            raise AssertionError(f"normalize różni się (przypadek {i}):\n{text!r}\n"
+                                 f"  regex:      {expected!r}\n  normalizer: {actual!r}")
+        expected, actual = legacy_collapse(text), normalizer.collapse_repeats(text)
+        if expected != actual:
+            raise AssertionError(f"collapse_repeats różni się (przypadek {i}):\n{text!r}\n"
+                                 f"  regex:      {expected!r}\n  normalizer: {actual!r}")
+        # Podział na losowe kawałki nie może zmieniać wyniku strumieniowego
+        cuts = sorted(rng.sample(range(len(text) + 1), min(rng.randint(1, 8), len(text) + 1)))
+        pieces = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        streamed = " ".join(normalizer.normalize_stream(pieces))
+        if streamed != legacy_sanitize(text):
+            raise AssertionError(f"normalize_stream różni się (przypadek {i}): {pieces!r}")
+    print(f"Równoważność: {cases} losowych tekstów zgodnych (seed {seed})")
+
+
+def pathological_inputs(size):
+    navigation = "Strona główna Wiadomości Sport Biznes Czytaj więcej Reklama onet.pl Onet.pl "
+    return {
+        "nawigacja": (navigation * (size // len(navigation) + 1))[:size],
+        "powtórzone słowo": ("Ala " * (size // 4 + 1))[:size],
+        "powtórzony bigram": ("ala ma " * (size // 6 + 1))[:size],
+        "długa domena": "a-" * (size // 4) + "a.pl " + "a-" * (size // 4) + "a.pl",
+        "kropki i myślniki": ("a.b-" * (size // 4 + 1))[:size] + " x",
+        # Różne tokeny krótsze niż 64 znaki, ale z wieloma członami domeny: regexy cofają się w każdym
+        "krótkie z kropkami": " ".join(f"{i}." + "ab.cd." * 9 + "pl" for i in range(size // 60 + 1))[:size],
+    }
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - start
+
+
+def article_text(size):
+    text = " ".join(scrapper.extract_text(url, html) or "" for url, html in load_fixtures().values())
+    return (text * (size // len(text) + 1))[:size]
+
+
+def run_benchmark(max_mb, legacy_cap):
+    sizes = []
+    size = 64 * 1024
+    while size <= max_mb * 2**20:
+        sizes.append(size)
+        size *= 4
+    print(f"  {'wejście':<20} {'rozmiar':>9} {'regex [s]':>10} {'normalizer [s]':>15}")
+    for size in sizes:
+        for name, text in {"artykuły": article_text(size), **pathological_inputs(size)}.items():
+            legacy = f"{timed(legacy_sanitize, text):10.3f}" if len(text) <= legacy_cap else f"{'-':>10}"
+            new = timed(normalizer.normalize, text)
+            print(f"  {name:<20} {len(text) / 2**20:7.2f}MB {legacy} {new:15.3f}")
+    print("  (na zwykłych artykułach regexy są szybsze; normalizer płaci za to brakiem przypadków kwadratowych)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-mb", type=float, default=4)
+    parser.add_argument("--legacy-cap", type=int, default=64 * 1024,
+                        help="maksymalna długość tekstu mierzonego starą wersją")
+    args = parser.parse_args(argv)
+    check_equivalence(args.cases, args.seed)
+    run_benchmark(args.max_mb, args.legacy_cap)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
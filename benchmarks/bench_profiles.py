@@ -0,0 +1,126 @@
+"""Czas parsowania i wynik każdego profilu strony na zapisanych fiksturach.
+
+    python -m benchmarks.bench_profiles
+    python -m benchmarks.bench_profiles --repeat 200
+
+Dla każdego profilu z scappers/site_profiles.json używana jest fikstura
+benchmarks/fixtures/<name>.html i adres z "example_url". Dla stron, które miały własne
+scrapery przed profilami, wynik porównywany jest z ich kopią (pełne drzewo html.parser);
+różny tekst kończy proces kodem 1. Mierzony jest też wybór profilu po domenie.
+"""
+import argparse
+import html as _html
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scappers import profiles  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+
+
+# Dawne scrapery (scappers/tvpinfo.py, generic_scrapper.py, sportowefakty.py) jako punkt odniesienia
+def legacy_generic(content, title_class='article__header--title', lead_class='article__heading',
+                   part_class='article__paragraph-item', paragraph_class=''):
+    soup = BeautifulSoup(content, 'html.parser')
+    h1_title = soup.find('h1', class_=title_class).get_text() if soup.find('h1', class_=title_class) else None
+    p_lead = soup.find('p', class_=lead_class).get_text() if soup.find('p', class_=lead_class) else 'No lead found'
+    div_content_parts = soup.find('div', class_=part_class)
+    p_content_parts = []
+    if div_content_parts:
+        for p in div_content_parts.find_all('p', class_=paragraph_class):
+            text = p.get_text()
+            if '\xa0' not in text and 'ZOBACZ WIDEO' not in text and not (p.find('a') and text == p.find('a').get_text()):
+                p_content_parts.append(text)
+    return h1_title + " " + p_lead + " " + " ".join(p_content_parts)
+
+
+def legacy_sportowefakty(content):
+    return legacy_generic(content, 'title', 'lead', 'contentparts', 'contentpart--text')
+
+
+def legacy_tvpinfo(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    title = None
+    for script in soup.find_all('script', type='application/ld+json'):
+        payload = json.loads(script.string or script.get_text() or '{}')
+        for obj in payload if isinstance(payload, list) else [payload]:
+            title = obj.get('headline') or title
+            if obj.get('articleBody'):
+                text = BeautifulSoup(_html.unescape(obj['articleBody']), 'html.parser').get_text(separator='\n', strip=True)
+                return title + ". " + '\n\n'.join(line.strip() for line in text.splitlines() if line.strip())
+    return None
+
+
+LEGACY = {"tvpinfo": legacy_tvpinfo, "sportowefakty": legacy_sportowefakty, "generic": legacy_generic}
+
+
+def legacy_match(url):
+    if re.search(r'^(?:https?://)?(?:www\.)?tvp\.info', url):
+        return "tvpinfo"
+    if re.search(r'sportowefakty', url):
+        return "sportowefakty"
+    return "generic"
+
+
+def timed(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return result, statistics.median(runs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--profiles", default=profiles.profiles_path, help="plik JSON z profilami")
+    args = parser.parse_args(argv)
+
+    registry = profiles.ProfileRegistry.from_file(args.profiles)
+    failed = False
+    print(f"  {'profil':<16} {'typ':<12} {'znaki':>7} {'profil [ms]':>12} {'dawniej [ms]':>13}  zgodność")
+    for profile in registry.profiles:
+        path = os.path.join(FIXTURES_DIR, f"{profile.name}.html")
+        url = profile.spec.get("example_url")
+        if not url or not os.path.exists(path):
+            print(f"  {profile.name:<16} {profile.type:<12} brak fikstury lub example_url")
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        if registry.match(url) is not profile:
+            print(f"  {profile.name:<16} {url} trafia do profilu {registry.match(url).name}")
+            failed = True
+            continue
+
+        text, seconds = timed(lambda: profile.extract(content), args.repeat)
+        line = f"  {profile.name:<16} {profile.type:<12} {len(text or ''):7d} {seconds * 1000:12.2f}"
+        legacy = LEGACY.get(profile.name)
+        if legacy is None:
+            print(f"{line} {'-':>13}  -")
+            continue
+        expected, legacy_s = timed(lambda: legacy(content), args.repeat)
+        same = (text or "").strip() == (expected or "").strip()
+        failed = failed or not same
+        print(f"{line} {legacy_s * 1000:13.2f}  {'tak' if same else 'NIE'} ({legacy_s / seconds:.1f}x)")
+
+    urls = [p.spec["example_url"] for p in registry.profiles if p.name in LEGACY and p.spec.get("example_url")] * 1000
+    mismatched = [u for u in urls if registry.match(u).name != legacy_match(u)]
+    _, match_s = timed(lambda: [registry.match(u) for u in urls], 5)
+    _, legacy_match_s = timed(lambda: [legacy_match(u) for u in urls], 5)
+    print(f"  wybór profilu: {match_s / len(urls) * 1e6:.2f} µs/URL (dawniej {legacy_match_s / len(urls) * 1e6:.2f}),"
+          f" różnice: {len(mismatched)}")
+    return 1 if failed or mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Porównanie trybu szybkiego CPU (int8) z pełnym fp32 na artykułach z fikstur.
+
+    python -m benchmarks.bench_quantization --tiny
+    python -m benchmarks.bench_quantization --model airKlizz/mt5-base-wikinewssum-polish
+
+Dla każdego wariantu mierzony jest czas streszczania i rozmiar modeli, a streszczenia int8
+porównywane są ze streszczeniami fp32 (ROUGE-1 i ROUGE-L F1 liczone na słowach).
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import quantization  # noqa: E402
+import scrapper  # noqa: E402
+import summarizer  # noqa: E402
+from benchmarks.bench import load_fixtures, peak_rss_mb  # noqa: E402
+from model_registry import model_size_bytes  # noqa: E402
+
+
+def words(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def f1(overlap, candidate_len, reference_len):
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / candidate_len, overlap / reference_len
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_1(candidate, reference):
+    cand, ref = words(candidate), words(reference)
+    counts = {}
+    for w in ref:
+        counts[w] = counts.get(w, 0) + 1
+    overlap = 0
+    for w in cand:
+        if counts.get(w):
+            counts[w] -= 1
+            overlap += 1
+    return f1(overlap, len(cand), len(ref))
+
+
+def rouge_l(candidate, reference):
+    cand, ref = words(candidate), words(reference)
+    if not cand or not ref:
+        return 0.0
+    previous = [0] * (len(ref) + 1)
+    for a in cand:
+        current = [0]
+        for j, b in enumerate(ref):
+            current.append(previous[j] + 1 if a == b else max(previous[j + 1], current[j]))
+        previous = current
+    return f1(previous[-1], len(cand), len(ref))
+
+
+def prepare(model_name, int8, tiny, texts):
+    summarizer.registry.clear()
+    quantization.cpu_fast_mode = int8
+    if tiny:
+        from benchmarks import tiny_models
+        tiny_models.install(texts, [model_name])
+        if int8:
+            quantization.configure_threads()
+            for name in (model_name, summarizer.translation_model_name):
+                model, tokenizer = summarizer.registry.get(name, None)
+                summarizer.registry.put(name, (quantization.quantize_model(model), tokenizer))
+
+    start = time.perf_counter()
+    summarizer.get_pipeline(model_name)
+    load_s = time.perf_counter() - start
+    names = [model_name] + ([] if model_name in summarizer.polish_models else [summarizer.translation_model_name])
+    size_mb = sum(model_size_bytes(summarizer.get_model(name)[0]) for name in names) / 2**20
+    return load_s, size_mb
+
+
+def run_variant(model_name, int8, tiny, texts, max_length, min_length, repeat):
+    load_s, size_mb = prepare(model_name, int8, tiny, texts)
+    summaries, seconds = [], []
+    for text in texts:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            chunk_summaries = summarizer.summarize_text_chunks(summarizer.sanitize_text(text), model_name)
+            result = summarizer.combine_summaries(chunk_summaries, max_length, min_length)
+            runs.append(time.perf_counter() - start)
+        summaries.append(result)
+        seconds.append(min(runs))
+    return {"load_s": load_s, "size_mb": size_mb, "seconds": seconds, "summaries": summaries}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=summarizer.polish_models[0])
+    parser.add_argument("--tiny", action="store_true", help="małe losowe modele zamiast prawdziwych wag")
+    parser.add_argument("--max-length", type=int, default=600)
+    parser.add_argument("--min-length", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--json", help="zapisz pełny raport do pliku JSON")
+    args = parser.parse_args(argv)
+
+    summarizer.use_cache = False
+    names = list(load_fixtures())
+    texts = [scrapper.extract_text(url, html) or "" for url, html in load_fixtures().values()]
+
+    fp32 = run_variant(args.model, False, args.tiny, texts, args.max_length, args.min_length, args.repeat)
+    int8 = run_variant(args.model, True, args.tiny, texts, args.max_length, args.min_length, args.repeat)
+
+    print(f"Model: {args.model}{' (tiny)' if args.tiny else ''}, wątki: {quantization.cpu_threads}")
+    print(f"  rozmiar modeli: fp32 {fp32['size_mb']:.1f} MB, int8 {int8['size_mb']:.1f} MB; "
+          f"ładowanie: fp32 {fp32['load_s']:.2f} s, int8 {int8['load_s']:.2f} s")
+    print(f"  {'fikstura':<20} {'fp32 [s]':>9} {'int8 [s]':>9} {'przysp.':>8} {'ROUGE-1':>8} {'ROUGE-L':>8}")
+    rows = []
+    for i, name in enumerate(names):
+        row = {
+            "fixture": name,
+            "fp32_s": fp32["seconds"][i],
+            "int8_s": int8["seconds"][i],
+            "rouge_1": rouge_1(int8["summaries"][i], fp32["summaries"][i]),
+            "rouge_l": rouge_l(int8["summaries"][i], fp32["summaries"][i]),
+        }
+        rows.append(row)
+        print(f"  {name:<20} {row['fp32_s']:9.3f} {row['int8_s']:9.3f} {row['fp32_s'] / row['int8_s']:7.2f}x "
+              f"{row['rouge_1']:8.3f} {row['rouge_l']:8.3f}")
+    print(f"  szczytowy RSS: {peak_rss_mb():.0f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model_name": args.model, "tiny": args.tiny, "rows": rows,
+                       "fp32": {k: v for k, v in fp32.items() if k != "summaries"},
+                       "int8": {k: v for k, v in int8.items() if k != "summaries"}}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
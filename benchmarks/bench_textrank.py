@@ -0,0 +1,97 @@
+"""Filtr TextRank: wektorowa wersja kontra prototyp z text_summary.ipynb.
+
+    python -m benchmarks.bench_textrank
+    python -m benchmarks.bench_textrank --copies 20 --keep 0.5
+
+Długi artykuł budowany jest ze sklejonych fikstur. Sprawdzane jest, że macierz podobieństw
+zgadza się z podwójną pętlą prototypu (te same lematy), a PageRank z networkx.pagerank.
+Mierzone są czasy obu wersji i to, ile tekstu zostaje po filtrze.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import scrapper  # noqa: E402
+import textrank  # noqa: E402
+from benchmarks.bench import load_fixtures  # noqa: E402
+
+
+def prototype_similarity(sent1, sent2):
+    # Jak sentence_similarity z notatnika: lista stopwords i Countery budowane dla każdej pary
+    stop_words = list(textrank.stopwords)
+    counts1 = Counter(w for w in sent1 if w not in stop_words)
+    counts2 = Counter(w for w in sent2 if w not in stop_words)
+    words = set(counts1) | set(counts2)
+    v1 = [counts1.get(w, 0) for w in words]
+    v2 = [counts2.get(w, 0) for w in words]
+    norm = math.sqrt(sum(a * a for a in v1)) * math.sqrt(sum(b * b for b in v2))
+    return sum(a * b for a, b in zip(v1, v2)) / norm if norm else 0.0
+
+
+def prototype_matrix(sentences):
+    terms = [textrank.sentence_terms(s) for s in sentences]
+    matrix = np.zeros((len(sentences), len(sentences)))
+    for i in range(len(sentences)):
+        for j in range(len(sentences)):
+            if i != j:
+                matrix[i][j] = prototype_similarity(terms[i], terms[j])
+    return matrix
+
+
+def long_article(copies):
+    texts = [scrapper.extract_text(url, html) or "" for url, html in load_fixtures().values()]
+    return " ".join(" ".join(texts) for _ in range(copies))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=4, help="ile razy skleić fikstury")
+    parser.add_argument("--keep", type=float, default=None, help="keep_ratio (domyślnie z textrank)")
+    args = parser.parse_args(argv)
+
+    text = long_article(args.copies)
+    sentences = textrank.split_sentences(text)
+    print(f"Tekst: {len(text)} znaków, {len(sentences)} zdań")
+
+    start = time.perf_counter()
+    textrank.similarity_matrix(sentences)
+    cold_s = time.perf_counter() - start
+    start = time.perf_counter()
+    similarity = textrank.similarity_matrix(sentences)
+    scores = textrank.pagerank(similarity)
+    vector_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = prototype_matrix(sentences)
+    prototype_s = time.perf_counter() - start
+    if not np.allclose(similarity.toarray(), reference):
+        raise AssertionError("Macierz rzadka różni się od macierzy prototypu")
+
+    import networkx as nx
+    nx_scores = nx.pagerank(nx.from_numpy_array(reference), alpha=textrank.damping, tol=1e-10)
+    if not np.allclose(scores, [nx_scores[i] for i in range(len(sentences))], atol=1e-5):
+        raise AssertionError("PageRank różni się od networkx.pagerank")
+    print("Zgodność: macierz podobieństw i PageRank jak w prototypie")
+
+    print(f"  prototyp (pętla O(n²)):   {prototype_s:8.3f} s")
+    print(f"  wektorowo (z lematyzacją): {cold_s:8.3f} s, z cache lematów: {vector_s:.3f} s "
+          f"({prototype_s / vector_s:.0f}x)")
+
+    textrank.prefilter_min_chars = 0
+    filtered = textrank.prefilter(text, args.keep)
+    print(f"  po filtrze: {len(filtered)} znaków ({len(filtered) / len(text):.0%}), "
+          f"{len(textrank.split_sentences(filtered))} zdań, słów {len(filtered.split())}/{len(text.split())}")
+    print(f"  cache lematów: {textrank.lemma.cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Skalowanie worker_pool: przepustowość i pamięć procesów dla różnej liczby procesów (CPU).
+
+    python -m benchmarks.bench_workers                       # mały losowy model, 1 2 4 procesy
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --copies 8
+    python -m benchmarks.bench_workers --model airKlizz/mt5-base-wikinewssum-polish
+
+Bez --model zapisywany jest do katalogu tymczasowego (jako models/<nazwa>/model.safetensors)
+losowy model T5 wielkości --d-model, więc benchmark działa bez sieci. Dla każdej liczby
+procesów mierzony jest start puli, liczba dokumentów na sekundę oraz RSS i PSS procesów
+roboczych (z /proc/<pid>/smaps_rollup, tylko Linux). PSS dzieli strony wspólne między procesy,
+więc suma PSS to faktyczny koszt pamięci puli. --compare dodaje dla porównania wiersze, w których
+każdy proces ładuje model zwykłym load_model (from_pretrained).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Procesy robocze dziedziczą środowisko: bez cache streszczeń i bez sieci
+os.environ["SUMMARY_CACHE"] = "0"
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+import scrapper  # noqa: E402
+import summarizer  # noqa: E402
+import worker_pool  # noqa: E402
+from benchmarks.bench import load_fixtures  # noqa: E402
+
+
+def memory_mb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {"rss": fields["Rss"], "pss": fields["Pss"],
+            "shared": fields["Shared_Clean"] + fields["Shared_Dirty"]}
+
+
+def save_tiny_model(texts, model_name, d_model, layers):
+    from benchmarks import tiny_models
+    tokenizer = tiny_models.build_tokenizer(texts, tiny_models.LANG_CODES)
+    model = tiny_models.build_model(len(tokenizer), d_model=d_model, layers=layers)
+    local_dir = worker_pool.model_dir(model_name)
+    model.save_pretrained(local_dir)
+    tokenizer.save_pretrained(local_dir)
+    return summarizer.model_size_bytes(model) / 2**20
+
+
+def run(texts, model_name, workers, shared, max_length, min_length):
+    start = time.perf_counter()
+    pool = worker_pool.WorkerPool([model_name], workers, shared=shared)
+    try:
+        pool.warmup()
+        start_s = time.perf_counter() - start
+        start = time.perf_counter()
+        results = pool.summarize_many(texts, model_name, max_length, min_length)
+        elapsed = time.perf_counter() - start
+        errors = [r for r in results if isinstance(r, str)]
+        if errors:
+            raise RuntimeError(f"Błąd w procesie roboczym: {errors[0]}")
+        memory = [memory_mb(pid) for pid in pool.worker_pids()]
+    finally:
+        pool.close()
+    return {"start_s": start_s, "docs_per_s": len(texts) / elapsed,
+            "rss": sum(m["rss"] for m in memory) / len(memory),
+            "pss": sum(m["pss"] for m in memory) / len(memory),
+            "shared": sum(m["shared"] for m in memory) / len(memory),
+            "pss_total": sum(m["pss"] for m in memory)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--model", help="prawdziwy model z models/ (domyślnie mały losowy)")
+    parser.add_argument("--copies", type=int, default=4, help="ile razy powtórzyć fikstury")
+    parser.add_argument("--d-model", type=int, default=512)
+    parser.add_argument("--layers", type=int, default=4)
+    # Domyślnie bez etapu MMR: mierzymy streszczanie, a model embeddingów wymagałby sieci
+    parser.add_argument("--max-length", type=int, default=100000)
+    parser.add_argument("--min-length", type=int, default=200)
+    parser.add_argument("--compare", action="store_true", help="porównaj z load_model w każdym procesie")
+    args = parser.parse_args(argv)
+
+    texts = [scrapper.extract_text(url, html) or "" for url, html in load_fixtures().values()]
+    documents = [f"{text} ({i})" for i in range(args.copies) for text in texts]
+    model_name = args.model or summarizer.polish_models[0]
+    if args.model:
+        worker_pool.models_dir = os.path.abspath(worker_pool.models_dir)
+        print(f"Model: {model_name}")
+    else:
+        # Procesy robocze startują w bieżącym katalogu, a load_model szuka wag w ./models
+        os.chdir(tempfile.mkdtemp(prefix="bench_workers_"))
+        size_mb = save_tiny_model(texts, model_name, args.d_model, args.layers)
+        print(f"Model: losowy T5 d_model={args.d_model}, warstwy={args.layers}, wagi {size_mb:.0f} MB")
+    print(f"Dokumenty: {len(documents)}, rdzenie CPU: {os.cpu_count()}")
+
+    print(f"  {'procesy':>7} {'wagi':<10} {'start [s]':>9} {'dok/s':>7} {'RSS/proc':>9} {'wspólne':>8} "
+          f"{'PSS/proc':>9} {'suma PSS':>9}  [MB]")
+    for workers in args.workers:
+        for shared in ([True, False] if args.compare else [True]):
+            r = run(documents, model_name, workers, shared, args.max_length, args.min_length)
+            print(f"  {workers:7d} {'mmap' if shared else 'load_model':<10} {r['start_s']:9.2f} {r['docs_per_s']:7.2f} "
+                  f"{r['rss']:9.0f} {r['shared']:8.0f} {r['pss']:9.0f} {r['pss_total']:9.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
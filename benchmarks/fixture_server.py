@@ -0,0 +1,97 @@
+"""Lokalny serwer HTTP z fiksturami HTML z benchmarks/fixtures (testy bez sieci).
+
+    python -m benchmarks.fixture_server --port 8766
+
+Każda fikstura jest pod /<nazwa pliku>, z ETag i Last-Modified; warunkowe żądania
+(If-None-Match, If-Modified-Since) dostają 304. url_map() podaje podmianę adresów fikstur
+z bench.FIXTURE_URLS na ten serwer dla fetcher.url_rewrites, więc profil strony dobierany
+jest nadal po prawdziwym adresie.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench import FIXTURE_URLS, FIXTURES_DIR  # noqa: E402
+
+host = "127.0.0.1"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    root = FIXTURES_DIR
+
+    def do_GET(self):
+        name = self.path.split("?", 1)[0].lstrip("/")
+        path = os.path.join(self.root, name)
+        if not name or "/" in name or not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        mtime = int(os.path.getmtime(path))
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self._not_modified(etag, mtime):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, etag, mtime):
+        if "If-None-Match" in self.headers:
+            return etag in [tag.strip() for tag in self.headers["If-None-Match"].split(",")]
+        since = self.headers.get("If-Modified-Since")
+        if since:
+            try:
+                return mtime <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(bind_port=0, root=None):
+    """Uruchamia serwer w wątku w tle; zwraca (serwer, adres bazowy)."""
+    handler = type("BoundFixtureHandler", (FixtureHandler,), {"root": root or FIXTURES_DIR})
+    server = ThreadingHTTPServer((host, bind_port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def url_map(base_url):
+    return {url: f"{base_url}/{name}" for name, url in FIXTURE_URLS.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokalny serwer fikstur HTML")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args(argv)
+    server, base_url = start(args.port)
+    for url, local_url in url_map(base_url).items():
+        print(f"  {url} -> {local_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
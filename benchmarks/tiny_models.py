@@ -0,0 +1,66 @@
+"""Małe, losowo zainicjalizowane modele seq2seq do benchmarków bez sieci i GPU.
+
+Słownik tokenizera budowany jest z tekstów fikstur, więc modele działają na tych samych
+danych co prawdziwy potok, tylko bez pobierania wag.
+"""
+import hashlib
+import re
+
+import numpy as np
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import GenerationConfig, PreTrainedTokenizerFast, T5Config, T5ForConditionalGeneration
+
+import ranking
+import summarizer
+
+LANG_CODES = ["pol_Latn", "eng_Latn"]
+
+
+def build_tokenizer(texts, extra_tokens=()):
+    vocab = {"<pad>": 0, "</s>": 1, "<unk>": 2}
+    for token in list(extra_tokens) + sorted({t for text in texts for t in re.findall(r'\w+|[^\w\s]+', text)}):
+        vocab.setdefault(token, len(vocab))
+
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(single="$A </s>", special_tokens=[("</s>", 1)])
+    return PreTrainedTokenizerFast(tokenizer_object=backend, pad_token="<pad>", eos_token="</s>",
+                                   unk_token="<unk>", model_max_length=1024)
+
+
+def build_model(vocab_size, seed=0, d_model=64, layers=2):
+    torch.manual_seed(seed)
+    config = T5Config(vocab_size=vocab_size, d_model=d_model, d_ff=d_model * 2, num_layers=layers,
+                      num_heads=4, d_kv=d_model // 4, decoder_start_token_id=0, pad_token_id=0, eos_token_id=1)
+    model = T5ForConditionalGeneration(config).eval()
+    model.generation_config = GenerationConfig(decoder_start_token_id=0, pad_token_id=0, eos_token_id=1,
+                                               max_length=128)
+    return model
+
+
+class HashingEmbedder:
+    """Zamiennik SentenceTransformer: losowa projekcja zahaszowanych słów."""
+
+    def __init__(self, dim=128, buckets=4096, seed=0):
+        self.buckets = buckets
+        self.projection = np.random.default_rng(seed).normal(size=(buckets, dim)).astype(np.float32)
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        counts = np.zeros((len(texts), self.buckets), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r'\w+', text.lower()):
+                counts[i, int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16) % self.buckets] += 1
+        vectors = counts @ self.projection
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return vectors
+
+
+def install(texts, model_names=None):
+    """Rejestruje małe modele w rejestrze pod nazwami prawdziwych modeli."""
+    tokenizer = build_tokenizer(texts, LANG_CODES)
+    for seed, name in enumerate([summarizer.translation_model_name] + list(model_names or summarizer.polish_models)):
+        summarizer.registry.put(name, (build_model(len(tokenizer), seed), tokenizer))
+    summarizer.registry.put(ranking.embedding_model_name, HashingEmbedder())
+    return tokenizer
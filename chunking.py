@@ -0,0 +1,101 @@
+import bisect
+import re
+import zlib
+
+max_chunk_tokens = 400
+chunk_overlap_tokens = 0
+model_chunk_tokens = {}
+# Cięcia "kotwiczone" treścią zdania: po edycji jednego akapitu kolejne chunki wracają na te same
+# granice, więc ich streszczenia można wziąć z cache (summary_cache)
+anchor_modulus = 4
+anchor_window = 0.25
+
+_paragraph_re = re.compile(r'\n\s*\n')
+_sentence_re = re.compile(r'[.!?…]["”»)]*(?=\s)')
+
+
+def token_limit(tokenizer, model_name=None):
+    limit = model_chunk_tokens.get(model_name, max_chunk_tokens)
+    model_max = getattr(tokenizer, "model_max_length", None) or limit
+    return max(8, min(limit, model_max) - tokenizer.num_special_tokens_to_add())
+
+
+def _boundary_tokens(positions, starts):
+    # Indeks pierwszego tokenu zaczynającego się za granicą akapitu/zdania
+    return sorted({bisect.bisect_left(starts, pos) for pos in positions})
+
+
+def _anchor_ends(text, sentence_ends):
+    # Zdanie jest kotwicą, jeśli hash jego treści (niezależny od położenia w tekście) dzieli się przez moduł
+    return [b for a, b in zip([0] + sentence_ends, sentence_ends)
+            if zlib.crc32(text[a:b].strip().encode("utf-8")) % anchor_modulus == 0]
+
+
+def _best_cut(paragraph_cuts, sentence_cuts, start, end, limit, anchor_cuts=()):
+    i = bisect.bisect_right(paragraph_cuts, end) - 1
+    if i >= 0 and paragraph_cuts[i] > start + limit // 2:
+        return paragraph_cuts[i]
+    i = bisect.bisect_right(anchor_cuts, end) - 1
+    if i >= 0 and anchor_cuts[i] > end - int(limit * anchor_window):
+        return anchor_cuts[i]
+    i = bisect.bisect_right(sentence_cuts, end) - 1
+    if i >= 0 and sentence_cuts[i] > start:
+        return sentence_cuts[i]
+    return end
+
+
+def iter_chunks(text, tokenizer, model_name=None, max_tokens=None, overlap=None):
+    """Dzieli tekst na chunki mieszczące się w limicie tokenów modelu.
+
+    Tekst jest tokenizowany raz (z mapowaniem offsetów), cięcia wypadają na granicach akapitów
+    lub zdań. Generator zwraca pary (chunk, liczba_tokenów_z_tokenami_specjalnymi).
+    """
+    specials = tokenizer.num_special_tokens_to_add()
+    limit = max_tokens - specials if max_tokens else token_limit(tokenizer, model_name)
+    overlap = chunk_overlap_tokens if overlap is None else overlap
+    overlap = min(overlap, limit // 2)
+
+    if not getattr(tokenizer, "is_fast", False):
+        yield from _iter_sentence_chunks(text, tokenizer, limit, specials)
+        return
+
+    offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                        truncation=False)["offset_mapping"]
+    n = len(offsets)
+    starts = [o[0] for o in offsets]
+    paragraph_cuts = _boundary_tokens((m.start() for m in _paragraph_re.finditer(text)), starts)
+    sentence_ends = [m.end() for m in _sentence_re.finditer(text)]
+    sentence_cuts = _boundary_tokens(sentence_ends, starts)
+    anchor_cuts = _boundary_tokens(_anchor_ends(text, sentence_ends), starts) if anchor_modulus else []
+
+    start = 0
+    while start < n:
+        end = min(start + limit, n)
+        if end < n:
+            end = _best_cut(paragraph_cuts, sentence_cuts, start, end, limit, anchor_cuts)
+
+        chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+        if chunk:
+            yield chunk, end - start + specials
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+
+
+def _iter_sentence_chunks(text, tokenizer, limit, specials):
+    # Wolne tokenizery nie zwracają offsetów - pakujemy całe zdania
+    ends = [m.end() for m in _sentence_re.finditer(text)] + [len(text)]
+    sentences = [text[a:b] for a, b in zip([0] + ends, ends) if text[a:b].strip()]
+    if not sentences:
+        return
+    counts = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+
+    chunk, chunk_tokens = [], 0
+    for sentence, count in zip(sentences, counts):
+        if chunk and chunk_tokens + count > limit:
+            yield " ".join(chunk), chunk_tokens + specials
+            chunk, chunk_tokens = [], 0
+        chunk.append(sentence.strip())
+        chunk_tokens += count
+    if chunk:
+        yield " ".join(chunk), chunk_tokens + specials
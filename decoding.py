@@ -0,0 +1,132 @@
+"""Profile dekodowania i dopasowanie generowania do terminu (deadline_s w get_summary).
+
+DeadlinePlan przed każdą partią szacuje ze zmierzonej przepustowości modelu, czy reszta chunków
+zdąży. Jeśli nie, kolejno: zmniejsza liczbę wiązek (quality -> balanced -> fast), skraca
+max_length, a na końcu pomija chunki o najniższej istotności.
+
+Przepustowość (record_throughput) zapisuje każda partia generowania, także bez terminu i przy
+rozgrzewce w preload_models, więc pierwsze żądanie z terminem ma już oszacowanie.
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+profiles = {
+    "fast": {"num_beams": 1, "no_repeat_ngram_size": 3, "repetition_penalty": 1.1,
+             "max_ratio": 0.45, "min_ratio": 0.3},
+    "balanced": {"num_beams": 2, "no_repeat_ngram_size": 3, "repetition_penalty": 1.1,
+                 "max_ratio": 0.6, "min_ratio": 0.4},
+    "quality": {"num_beams": 4, "no_repeat_ngram_size": 3, "repetition_penalty": 1.1,
+                "max_ratio": 0.6, "min_ratio": 0.4},
+}
+default_profile = "quality"
+# Kolejność obniżania jakości przy braku czasu
+downgrade_order = ["quality", "balanced", "fast"]
+length_scale_step = 0.75
+min_length_scale = 0.5
+# Część pozostałego czasu, którą wolno zaplanować na generowanie (reszta na MMR i post-processing)
+time_budget_share = 0.85
+
+_throughput = {}
+_throughput_lock = threading.Lock()
+
+
+def get_profile(name=None):
+    name = name or default_profile
+    if name not in profiles:
+        raise ValueError(f"Nieznany profil dekodowania: {name} (dostępne: {', '.join(profiles)})")
+    return profiles[name]
+
+
+def generation_units(gen_kwargs, chunks=1):
+    # Koszt dekodowania ~ długość wyjścia * liczba wiązek
+    return gen_kwargs["max_length"] * gen_kwargs["num_beams"] * chunks
+
+
+def record_throughput(model_name, units, seconds):
+    # Średnia krocząca: pierwsze partie są zwykle wolniejsze (rozgrzewka), więc nowsze ważą więcej
+    if units <= 0 or not model_name:
+        return
+    with _throughput_lock:
+        previous = _throughput.get(model_name)
+        current = seconds / units
+        _throughput[model_name] = current if previous is None else 0.5 * previous + 0.5 * current
+
+
+def chunk_salience(chunks):
+    """Podobieństwo cosinusowe worka słów chunku do całego dokumentu; pierwszy chunk (lead) ma premię."""
+    bags = [Counter(re.findall(r'\w+', chunk.lower())) for chunk in chunks]
+    document = Counter()
+    for bag in bags:
+        document.update(bag)
+    doc_norm = math.sqrt(sum(v * v for v in document.values())) or 1.0
+    scores = []
+    for bag in bags:
+        norm = math.sqrt(sum(v * v for v in bag.values())) or 1.0
+        scores.append(sum(v * document[w] for w, v in bag.items()) / (norm * doc_norm))
+    if scores:
+        scores[0] += 1.0
+    return scores
+
+
+class DeadlinePlan:
+    def __init__(self, model_name, deadline_s, profile=None):
+        get_profile(profile)
+        self.model_name = model_name
+        self.requested_profile = profile or default_profile
+        self.profile = self.requested_profile
+        self.length_scale = 1.0
+        self.deadline = time.monotonic() + deadline_s
+        self.downgrades = []
+        self.dropped = []
+        self.degraded = set()
+
+    def remaining_s(self):
+        return self.deadline - time.monotonic()
+
+    def is_degraded(self):
+        return self.profile != self.requested_profile or self.length_scale != 1.0
+
+    def seconds_per_unit(self):
+        with _throughput_lock:
+            return _throughput.get(self.model_name)
+
+    def record(self, units, seconds):
+        record_throughput(self.model_name, units, seconds)
+
+    def fit(self, pending, units_fn, salience):
+        """Obniża profil / długość lub pomija chunki, aż szacowany czas pending zmieści się w terminie.
+
+        units_fn(indeksy) zwraca koszt chunków przy bieżących ustawieniach. Zwraca pozostałe indeksy.
+        """
+        rate = self.seconds_per_unit()
+        if rate is None:
+            return pending
+        budget = self.remaining_s() * time_budget_share
+
+        while pending and units_fn(pending) * rate > budget:
+            position = downgrade_order.index(self.profile) if self.profile in downgrade_order else 0
+            if position + 1 < len(downgrade_order):
+                self.profile = downgrade_order[position + 1]
+                self.downgrades.append(f"profile:{self.profile}")
+            elif self.length_scale * length_scale_step >= min_length_scale:
+                self.length_scale *= length_scale_step
+                self.downgrades.append(f"length_scale:{self.length_scale:.2f}")
+            elif len(pending) > 1:
+                victim = min(pending, key=lambda i: salience[i])
+                pending = [i for i in pending if i != victim]
+                self.dropped.append(victim)
+            else:
+                break
+        return pending
+
+    def report(self):
+        return {
+            "profile_requested": self.requested_profile,
+            "profile_used": self.profile,
+            "length_scale": self.length_scale,
+            "downgrades": list(self.downgrades),
+            "dropped_chunks": len(self.dropped),
+        }
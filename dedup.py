@@ -0,0 +1,238 @@
+"""Wykrywanie prawie-duplikatów artykułów (przedruki, lekko zredagowane kopie) przed streszczaniem.
+
+Tekst po sanitize_text dzielony jest na shingle (shingle_words kolejnych słów), z nich liczona
+jest sygnatura MinHash (num_perm permutacji, numpy), a sygnatury trafiają do indeksu LSH
+(pasma sygnatury jako klucze) w SQLite obok cache streszczeń. Artykuł podobny do już
+streszczonego w stopniu >= threshold (szacowany współczynnik Jaccarda) dostaje gotowe
+streszczenie z cache; mniej podobne przechodzą zwykłą ścieżką, w której niezmienione
+akapity i tak trafiają w cache chunków.
+
+    python dedup.py                 # statystyki indeksu: odsetek duplikatów, czas wyszukiwania
+"""
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import metrics
+from summary_cache import SqliteStore
+
+enabled = os.environ.get("SUMMARY_DEDUP", "1") != "0"
+dedup_path = os.environ.get("SUMMARY_DEDUP_PATH", os.path.join("cache", "dedup.sqlite"))
+# Minimalny szacowany współczynnik Jaccarda shingli, od którego artykuł jest duplikatem
+threshold = float(os.environ.get("SUMMARY_DEDUP_THRESHOLD", "0.8"))
+shingle_words = 5
+num_perm = 128
+seed = 1
+# Kandydaci z LSH są sprawdzani pełną sygnaturą, więc fałszywe trafienie kosztuje tylko porównanie,
+# a pominięcie oznacza ponowne streszczanie: parametry LSH ważą pominięcia mocniej
+false_positive_weight = 0.1
+latency_window = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY, scope TEXT NOT NULL, doc_key TEXT NOT NULL UNIQUE,
+    signature BLOB NOT NULL, created REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS bands (
+    key INTEGER NOT NULL, doc_id INTEGER NOT NULL, PRIMARY KEY (key, doc_id)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bands_doc ON bands (doc_id);
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value REAL NOT NULL);
+"""
+
+_word_re = re.compile(r'\w+')
+_mersenne_prime = np.uint64((1 << 61) - 1)
+_max_hash = np.uint64((1 << 32) - 1)
+_permutations = {}
+
+
+def shingles(text, k=None):
+    k = k or shingle_words
+    words = _word_re.findall(text.lower())
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def _get_permutations(n):
+    # h to 32-bitowe crc32, a i b < 2^32: a*h + b < 2^64, więc uint64 liczy dokładnie, bez przepełnienia
+    if n not in _permutations:
+        rng = np.random.RandomState(seed)
+        _permutations[n] = (rng.randint(1, 1 << 32, size=n, dtype=np.uint64),
+                            rng.randint(0, 1 << 32, size=n, dtype=np.uint64))
+    return _permutations[n]
+
+
+def signature(shingle_set, n=None):
+    """MinHash: dla każdej permutacji (a*h + b) mod p najmniejsza wartość po wszystkich shinglach."""
+    n = n or num_perm
+    if not shingle_set:
+        return np.full(n, _max_hash, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64,
+                         count=len(shingle_set))
+    a, b = _get_permutations(n)
+    values = (hashes[:, None] * a[None, :] + b[None, :]) % _mersenne_prime
+    return np.bitwise_and(values, _max_hash).min(axis=0)
+
+
+def similarity(sig1, sig2):
+    """Szacowany współczynnik Jaccarda: odsetek zgodnych pozycji sygnatur."""
+    return float(np.mean(sig1 == sig2))
+
+
+def lsh_params(t=None, n=None):
+    """(pasma, wiersze) minimalizujące ważoną sumę fałszywych trafień i pominięć dla progu t."""
+    t = threshold if t is None else t
+    n = n or num_perm
+    xs = np.linspace(0.0, 1.0, 201)
+    best = None
+    for bands in range(1, n + 1):
+        rows = n // bands
+        if rows == 0:
+            break
+        probability = 1 - (1 - xs ** rows) ** bands
+        false_positive = np.trapezoid(np.where(xs < t, probability, 0), xs)
+        false_negative = np.trapezoid(np.where(xs >= t, 1 - probability, 0), xs)
+        error = false_positive_weight * false_positive + (1 - false_positive_weight) * false_negative
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def band_keys(sig, bands, rows):
+    # Klucz pasma to 63-bitowy skrót (numer pasma + wartości), mieści się w INTEGER SQLite
+    keys = []
+    for band in range(bands):
+        digest = hashlib.blake2b(sig[band * rows:(band + 1) * rows].tobytes(), digest_size=8,
+                                 person=band.to_bytes(4, "little")).digest()
+        keys.append(int.from_bytes(digest, "little") >> 1)
+    return keys
+
+
+class DedupIndex(SqliteStore):
+    """Trwały indeks LSH sygnatur MinHash; wpis wskazuje klucz dokumentu w cache streszczeń."""
+    schema = _SCHEMA
+
+    def __init__(self, path=None, min_similarity=None):
+        self.threshold = threshold if min_similarity is None else min_similarity
+        self.bands, self.rows = lsh_params(self.threshold)
+        self._latencies = []
+        self._lock = threading.Lock()
+        super().__init__(path or dedup_path)
+
+    def candidates(self, sig, scope):
+        """[(podobieństwo, klucz dokumentu)] z kandydatów LSH w danym zakresie, od najbardziej podobnych."""
+        keys = band_keys(sig, self.bands, self.rows)
+        conn = self._connect()
+        rows = conn.execute(
+            f"SELECT d.doc_key, d.signature FROM documents d WHERE d.scope = ? AND d.id IN "
+            f"(SELECT doc_id FROM bands WHERE key IN ({','.join('?' * len(keys))}))", (scope, *keys)).fetchall()
+        found = [(similarity(sig, np.frombuffer(blob, dtype=np.uint64)), doc_key) for doc_key, blob in rows]
+        return sorted(found, reverse=True)
+
+    def lookup(self, text, scope, resolve=None):
+        """Najbardziej podobny dokument >= threshold jako (podobieństwo, klucz, wynik resolve) albo None.
+
+        resolve(klucz) zwraca np. streszczenie z cache; wpisy, dla których zwraca None (usunięte
+        z cache), są usuwane z indeksu i szukanie idzie dalej.
+        """
+        start = time.perf_counter()
+        with metrics.span("dedup_lookup"):
+            sig = signature(shingles(text))
+            found = None
+            best = 0.0
+            for score, doc_key in self.candidates(sig, scope):
+                best = max(best, score)
+                if score < self.threshold:
+                    break
+                value = resolve(doc_key) if resolve else doc_key
+                if value is None:
+                    self.remove(doc_key)
+                    continue
+                found = (score, doc_key, value)
+                break
+        elapsed = time.perf_counter() - start
+
+        conn = self._connect()
+        self._bump(conn, "lookups")
+        self._bump(conn, "lookup_seconds", elapsed)
+        if found:
+            self._bump(conn, "duplicates")
+        elif best > 0:
+            # Kandydat z LSH poniżej progu: streszczany od nowa, wspólne akapity trafią w cache chunków
+            self._bump(conn, "partial")
+        with self._lock:
+            self._latencies = (self._latencies + [elapsed])[-latency_window:]
+        metrics.count("dedup_hits" if found else "dedup_misses")
+        return found
+
+    def add(self, text, scope, doc_key):
+        sig = signature(shingles(text))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM bands WHERE doc_id IN (SELECT id FROM documents WHERE doc_key = ?)", (doc_key,))
+            conn.execute("INSERT OR REPLACE INTO documents (scope, doc_key, signature, created) VALUES (?, ?, ?, ?)",
+                         (scope, doc_key, sig.tobytes(), time.time()))
+            doc_id = conn.execute("SELECT id FROM documents WHERE doc_key = ?", (doc_key,)).fetchone()[0]
+            conn.executemany("INSERT OR IGNORE INTO bands (key, doc_id) VALUES (?, ?)",
+                             [(key, doc_id) for key in band_keys(sig, self.bands, self.rows)])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def remove(self, doc_key):
+        conn = self._connect()
+        conn.execute("DELETE FROM bands WHERE doc_id IN (SELECT id FROM documents WHERE doc_key = ?)", (doc_key,))
+        conn.execute("DELETE FROM documents WHERE doc_key = ?", (doc_key,))
+
+    def stats(self):
+        conn = self._connect()
+        values = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        lookups = int(values.get("lookups", 0))
+        with self._lock:
+            latencies = sorted(self._latencies)
+        return {
+            "documents": conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0],
+            "threshold": self.threshold,
+            "bands": [self.bands, self.rows],
+            "lookups": lookups,
+            "duplicates": int(values.get("duplicates", 0)),
+            "partial": int(values.get("partial", 0)),
+            "dedup_ratio": values.get("duplicates", 0) / lookups if lookups else 0.0,
+            "mean_lookup_ms": 1000 * values.get("lookup_seconds", 0.0) / lookups if lookups else 0.0,
+            "p95_lookup_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+        }
+
+    def clear(self):
+        conn = self._connect()
+        for table in ("documents", "bands", "stats"):
+            conn.execute(f"DELETE FROM {table}")
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_index():
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = DedupIndex()
+    return _default_index
+
+
+def main(argv=None):
+    index = DedupIndex(argv[0] if argv else None)
+    for name, value in index.stats().items():
+        print(f"  {name}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,249 @@
+"""Pobieranie stron z cache HTML na dysku, warunkowymi żądaniami i odstępem między żądaniami do hosta.
+
+    python fetcher.py               # rozmiar cache HTML
+    python fetcher.py --prune 64    # usuwa najdawniej używane strony aż do 64 MB
+
+Sprawdzenie offline (304, stara kopia przy błędzie sieci, odstępy per host, przycinanie cache):
+python -m benchmarks.bench_fetcher.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+cache_dir = os.environ.get("SUMMARY_HTML_CACHE", os.path.join("cache", "html"))
+max_cache_mb = int(os.environ.get("SUMMARY_HTML_CACHE_MB", "256"))
+prune_every = 100
+timeout = (5, 20)
+max_retries = 3
+pool_maxsize = 16
+max_workers = 8
+per_host_interval = 0.5
+user_agent = "Mozilla/5.0 (X11; Linux x86_64) news-summary/0.1"
+# Adresy pobierane spod innego adresu (np. fikstury z benchmarks.fixture_server); cache i profil strony
+# używają adresu oryginalnego
+url_rewrites = {}
+
+
+def make_session():
+    retry = Retry(total=max_retries, backoff_factor=0.5,
+                  status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET", "HEAD"], respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = user_agent
+    return session
+
+
+def _write_atomic(path, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class HtmlCache:
+    """Cache HTML na dysku: treść adresowana skrótem SHA-256, metadane (ETag, Last-Modified) per URL.
+
+    Czas modyfikacji pliku treści to czas ostatniego użycia; co prune_every zapisów cache
+    przycinany jest do max_bytes, od najdawniej używanych stron.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or cache_dir
+        self.max_bytes = max_bytes if max_bytes is not None else max_cache_mb * 2**20
+        self._writes = 0
+        self._prune_lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "urls"), exist_ok=True)
+
+    def _meta_path(self, url):
+        return os.path.join(self.root, "urls", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest)
+
+    def get(self, url):
+        try:
+            with open(self._meta_path(url), encoding="utf-8") as f:
+                meta = json.load(f)
+            object_path = self._object_path(meta["sha256"])
+            with open(object_path, "rb") as f:
+                body = f.read()
+            os.utime(object_path)
+            return meta, body
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, url, body: bytes, headers):
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(digest)
+        if os.path.exists(object_path):
+            os.utime(object_path)
+        else:
+            _write_atomic(object_path, body)
+        meta = {
+            "url": url,
+            "sha256": digest,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        _write_atomic(self._meta_path(url), json.dumps(meta).encode("utf-8"))
+        self._writes += 1
+        if self._writes % prune_every == 0:
+            self.prune()
+
+    def _objects(self):
+        objects = []
+        with os.scandir(os.path.join(self.root, "objects")) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                objects.append((stat.st_mtime, stat.st_size, entry.path))
+        return objects
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._objects())
+
+    def prune(self, max_bytes=None):
+        """Usuwa najdawniej używane strony (i ich metadane) aż do max_bytes; zwraca liczbę usuniętych."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._prune_lock:
+            objects = sorted(self._objects())
+            excess = sum(size for _, size, _ in objects) - max_bytes
+            if excess <= 0:
+                return 0
+            removed = set()
+            for _, size, path in objects:
+                if excess <= 0:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                removed.add(os.path.basename(path))
+                excess -= size
+            # Metadane bez treści i tak dałyby chybienie; usuwamy je, żeby katalog urls nie rósł
+            with os.scandir(os.path.join(self.root, "urls")) as entries:
+                for entry in entries:
+                    try:
+                        with open(entry.path, encoding="utf-8") as f:
+                            stale = json.load(f).get("sha256") in removed
+                        if stale:
+                            os.remove(entry.path)
+                    except (OSError, ValueError):
+                        continue
+            return len(removed)
+
+
+class Fetcher:
+    def __init__(self, cache=None, session=None, host_interval=None):
+        self.session = session or make_session()
+        self.cache = HtmlCache() if cache is None else cache
+        self.host_interval = per_host_interval if host_interval is None else host_interval
+        self._host_next = {}
+        self._host_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"downloaded": 0, "not_modified": 0, "stale": 0, "errors": 0}
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _wait_for_host(self, url):
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            now = time.monotonic()
+            slot = max(now, self._host_next.get(host, 0.0))
+            self._host_next[host] = slot + self.host_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def fetch(self, url):
+        cached = self.cache.get(url) if self.cache else None
+        headers = {}
+        if cached:
+            meta, _ = cached
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        target = url_rewrites.get(url, url)
+        self._wait_for_host(target)
+        try:
+            response = self.session.get(target, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            if cached:
+                self._count("stale")
+                return cached[1]
+            print(f"Nie udało się pobrać {url}: {e}")
+            self._count("errors")
+            return None
+
+        if response.status_code == 304 and cached:
+            self._count("not_modified")
+            return cached[1]
+
+        if response.status_code != 200:
+            self._count("errors")
+            return None
+
+        self._count("downloaded")
+        if self.cache:
+            self.cache.put(url, response.content, response.headers)
+        return response.content
+
+    def fetch_many(self, urls, workers=None):
+        urls = list(urls)
+        with ThreadPoolExecutor(max_workers=workers or max_workers) as pool:
+            return list(pool.map(self.fetch, urls))
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher():
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher()
+    return _default_fetcher
+
+
+def fetch(url):
+    return get_fetcher().fetch(url)
+
+
+def fetch_many(urls, workers=None):
+    return get_fetcher().fetch_many(urls, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache HTML pobranych stron")
+    parser.add_argument("--prune", type=float, metavar="MB", help="przytnij cache do podanego rozmiaru")
+    args = parser.parse_args(argv)
+    cache = HtmlCache()
+    if args.prune is not None:
+        print(f"Usunięto stron: {cache.prune(int(args.prune * 2**20))}")
+    print(f"Cache HTML w {cache.root}: {cache.size_bytes() / 2**20:.1f} MB (limit {cache.max_bytes / 2**20:.0f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from scrapper import scrape_text_from_url
 import re
-from summarizer import get_summary
+from summarizer import get_summary, preload_models, SummaryCancelled
 import csv
 import os
+import queue
+import threading
+
+poll_interval_ms = 100
 
 class NewsSummarizerApp:
     def __init__(self, master):
@@ -16,8 +20,17 @@ class NewsSummarizerApp:
         self.url_var = tk.StringVar()
         self.max_chars_var = tk.StringVar(value="2000")
         self.min_chars_var = tk.StringVar(value="1500")
+        self.status_var = tk.StringVar(value="")
+
+        # Wątek roboczy komunikuje się z interfejsem wyłącznie przez tę kolejkę
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
+        self.chunk_summaries = {}
 
         self.create_widgets()
+        self.start_preload()
+        self.master.after(poll_interval_ms, self.poll_events)
 
     def create_widgets(self):
         mode_frame = ttk.Frame(self.master, padding="8")
@@ -83,8 +96,18 @@ class NewsSummarizerApp:
                                         values=example_models, state="readonly", width=30)
         self.model_combobox.pack(side=tk.LEFT, padx=(5,0))
 
-        generate_button = ttk.Button(self.master, text="Generuj podsumowanie", command=self.generate_summary_action)
-        generate_button.pack(pady=10)
+        actions_frame = ttk.Frame(self.master)
+        actions_frame.pack(pady=10)
+        self.generate_button = ttk.Button(actions_frame, text="Generuj podsumowanie", command=self.generate_summary_action)
+        self.generate_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(actions_frame, text="Anuluj", command=self.cancel_action, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        progress_frame = ttk.Frame(self.master, padding=(10, 0))
+        progress_frame.pack(fill='x', padx=10)
+        self.progress = ttk.Progressbar(progress_frame, mode="determinate")
+        self.progress.pack(fill='x')
+        ttk.Label(progress_frame, textvariable=self.status_var, anchor='w').pack(fill='x')
 
         output_frame = ttk.Frame(self.master, padding="10")
         output_frame.pack(fill='both', expand=True, padx=10, pady=5)
@@ -138,45 +161,129 @@ class NewsSummarizerApp:
             messagebox.showerror("Błąd", "Minimalna liczba znaków musi być liczbą całkowitą.")
             return
 
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, "Trwa generowanie podsumowania... Proszę czekać.")
-        self.master.update()
-
+        if mode == "input":
+            text = self.input_text.get("1.0", tk.END).strip()
+            if not text:
+                messagebox.showerror("Błąd", "Proszę wprowadzić tekst wejściowy.")
+                return
+            url = None
+        else:
+            url = self.url_var.get().strip()
+            if not url:
+                messagebox.showerror("Błąd", "Proszę podać URL artykułu.")
+                return
+            text = None
+
+        self.chunk_summaries = {}
+        self.cancel_event = threading.Event()
+        self.show_output("Trwa generowanie podsumowania... Proszę czekać.")
+        self.progress.configure(mode="indeterminate")
+        self.progress.start(10)
+        self.status_var.set("Pobieranie artykułu..." if url else "Streszczanie...")
+        self.generate_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+
+        self.worker = threading.Thread(target=self.summarize_worker, daemon=True,
+                                       args=(text, url, selected_model, max_length, min_length, self.cancel_event))
+        self.worker.start()
+
+    def summarize_worker(self, text, url, model_name, max_length, min_length, cancel_event):
+        # Działa poza wątkiem Tk - nie wolno tu dotykać widżetów
         try:
-            if mode == "input":
-                text = self.input_text.get("1.0", tk.END).strip()
-                if not text:
-                    messagebox.showerror("Błąd", "Proszę wprowadzić tekst wejściowy.")
-                    return
-            else:
-                url = self.url_var.get().strip()
-                if not url:
-                    messagebox.showerror("Błąd", "Proszę podać URL artykułu.")
-                    return
+            if url:
                 scraped = scrape_text_from_url(url)
                 if isinstance(scraped, (list, tuple)):
                     text = " ".join([s for s in scraped if s])
                 else:
                     text = scraped or ""
+                if cancel_event.is_set():
+                    raise SummaryCancelled()
+                self.events.put(("status", "Streszczanie..."))
 
-            summary, time = get_summary(text, selected_model, max_length, min_length)
-            
-            csv_filename = "summary_log.csv"
-            file_exists = os.path.isfile(csv_filename)
-            with open(csv_filename, mode="a", encoding="utf-8", newline='') as f:
-                writer = csv.writer(f)
-                if not file_exists:
-                    writer.writerow(["text_length", "model_name", "summary_length", "elapsed_s", "summary_text"])
-                writer.writerow([len(text), selected_model, len(summary), time, summary])
-
-            self.output_text.delete(1.0, tk.END)
-            self.output_text.insert(tk.END, summary)
+            def on_chunk(index, total, summary):
+                self.events.put(("chunk", index, total, summary))
 
+            result = get_summary(text, model_name, max_length, min_length, on_chunk=on_chunk, cancel=cancel_event)
+            if isinstance(result, str):
+                # get_summary zwraca sam komunikat przy pustym tekście lub błędzie
+                self.events.put(("error", result))
+            else:
+                self.events.put(("done", text, model_name, result[0], result[1]))
+        except SummaryCancelled:
+            self.events.put(("cancelled",))
         except Exception as e:
-            self.output_text.delete(1.0, tk.END)
-            self.output_text.insert(tk.END, f"Wystąpił błąd podczas generowania podsumowania: {e}")
-            messagebox.showerror("Błąd operacji", f"Wystąpił błąd: {e}")
+            self.events.put(("error", f"Wystąpił błąd podczas generowania podsumowania: {e}"))
+
+    def cancel_action(self):
+        self.cancel_event.set()
+        self.cancel_button.configure(state=tk.DISABLED)
+        self.status_var.set("Anulowanie po bieżącej partii...")
 
+    def start_preload(self):
+        model_name = self.model_var.get()
+        self.status_var.set(f"Ładowanie modelu {model_name}...")
+
+        def preload():
+            try:
+                preload_models([model_name])
+                self.events.put(("preloaded", model_name))
+            except Exception as e:
+                self.events.put(("preloaded", f"{model_name} (błąd: {e})"))
+
+        threading.Thread(target=preload, daemon=True).start()
+
+    def poll_events(self):
+        try:
+            while True:
+                self.handle_event(*self.events.get_nowait())
+        except queue.Empty:
+            pass
+        self.master.after(poll_interval_ms, self.poll_events)
+
+    def handle_event(self, kind, *args):
+        if kind == "status":
+            self.status_var.set(args[0])
+        elif kind == "preloaded":
+            if self.worker is None or not self.worker.is_alive():
+                self.status_var.set(f"Model gotowy: {args[0]}")
+        elif kind == "chunk":
+            index, total, summary = args
+            self.chunk_summaries[index] = summary
+            self.progress.stop()
+            self.progress.configure(mode="determinate", maximum=total, value=len(self.chunk_summaries))
+            self.status_var.set(f"Streszczono {len(self.chunk_summaries)}/{total} fragmentów")
+            self.show_output("\n\n".join(self.chunk_summaries[i] for i in sorted(self.chunk_summaries)))
+        elif kind == "done":
+            text, model_name, summary, elapsed = args
+            self.write_log(text, model_name, summary, elapsed)
+            self.show_output(summary)
+            self.finish(f"Gotowe ({elapsed:.1f} s)")
+        elif kind == "cancelled":
+            self.finish("Anulowano")
+        elif kind == "error":
+            self.show_output(args[0])
+            self.finish("Błąd")
+            messagebox.showerror("Błąd operacji", args[0])
+
+    def finish(self, status):
+        self.progress.stop()
+        self.progress.configure(mode="determinate", maximum=1, value=1 if status.startswith("Gotowe") else 0)
+        self.status_var.set(status)
+        self.generate_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+
+    def show_output(self, text):
+        self.output_text.delete(1.0, tk.END)
+        self.output_text.insert(tk.END, text)
+
+    def write_log(self, text, model_name, summary, elapsed):
+        csv_filename = "summary_log.csv"
+        file_exists = os.path.isfile(csv_filename)
+        with open(csv_filename, mode="a", encoding="utf-8", newline='') as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(["text_length", "model_name", "summary_length", "elapsed_s", "summary_text"])
+            writer.writerow([len(text), model_name, len(summary), elapsed, summary])
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,218 @@
+"""Pomiary czasu etapów i liczniki potoku streszczania.
+
+    with metrics.span("generate", model=model_name):
+        ...
+    metrics.count("output_tokens", n)
+
+Przy wyłączonych metrykach span() zwraca współdzielony pusty obiekt, a count() kończy się
+na jednym sprawdzeniu flagi, więc instrumentacja może zostać w kodzie produkcyjnym.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+enabled = os.environ.get("SUMMARY_METRICS", "0") == "1"
+profile_generate = os.environ.get("SUMMARY_PROFILE", "0") == "1"
+profile_dir = "profiles"
+metrics_prefix = "summarizer"
+
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+_sinks = []
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        with _lock:
+            timing = _timings.setdefault(self.name, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += duration
+            timing[2] = max(timing[2], duration)
+        if _sinks:
+            event = {"ts": time.time(), "type": "span", "name": self.name, "value": duration,
+                     "error": exc_type.__name__ if exc_type else None, **self.attrs}
+            for sink in list(_sinks):
+                sink.emit(event)
+        return False
+
+
+def span(name, **attrs):
+    if not enabled:
+        return _NULL_SPAN
+    return Span(name, attrs)
+
+
+def count(name, value=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def profiled(name):
+    """Opcjonalny torch.profiler wokół generate(); ślad trafia do profile_dir w formacie Chrome."""
+    if not (enabled and profile_generate):
+        return nullcontext()
+    return _TorchProfile(name)
+
+
+class _TorchProfile:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        import torch
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self.profiler = torch.profiler.profile(activities=activities, record_shapes=True)
+        self.profiler.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.__exit__(*exc)
+        os.makedirs(profile_dir, exist_ok=True)
+        self.profiler.export_chrome_trace(os.path.join(profile_dir, f"{self.name}-{time.time_ns()}.json"))
+        return False
+
+
+def snapshot():
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "timings": {name: {"count": n, "total_s": total, "max_s": longest}
+                        for name, (n, total, longest) in _timings.items()},
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+
+
+class JsonlSink:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def emit(self, event):
+        with self._lock:
+            self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink:
+    fields = ["ts", "type", "name", "value", "error", "attrs"]
+
+    def __init__(self, path):
+        new_file = not os.path.isfile(path)
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._lock = threading.Lock()
+        if new_file:
+            self._writer.writerow(self.fields)
+
+    def emit(self, event):
+        attrs = {k: v for k, v in event.items() if k not in self.fields}
+        with self._lock:
+            self._writer.writerow([event.get(k) for k in self.fields[:-1]] + [json.dumps(attrs, ensure_ascii=False)])
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def add_sink(sink):
+    _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+        sink.close()
+
+
+def _metric_name(name):
+    return f"{metrics_prefix}_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def prometheus_text(extra_gauges=None):
+    """Wszystkie liczniki i czasy etapów w formacie tekstowym Prometheusa."""
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data["counters"].items()):
+        metric = _metric_name(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    if data["timings"]:
+        metric = _metric_name("stage_seconds")
+        lines.append(f"# TYPE {metric} summary")
+        for name, timing in sorted(data["timings"].items()):
+            lines.append(f'{metric}_sum{{stage="{name}"}} {timing["total_s"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {timing["count"]}')
+        metric = _metric_name("stage_seconds_max")
+        lines.append(f"# TYPE {metric} gauge")
+        for name, timing in sorted(data["timings"].items()):
+            lines.append(f'{metric}{{stage="{name}"}} {timing["max_s"]:.6f}')
+    for name, value in sorted((extra_gauges or {}).items()):
+        metric = _metric_name(name)
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port=9108, host="127.0.0.1"):
+    """Uruchamia w tle endpoint /metrics dla Prometheusa."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,143 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+memory_budget_mb = int(os.environ.get("SUMMARY_MODEL_BUDGET_MB", "6000"))
+
+
+def model_size_bytes(model) -> int:
+    # Przez state_dict, żeby policzyć też spakowane wagi int8 (nie są parametrami); wspólne tensory raz
+    import torch
+    seen = set()
+    size = 0
+    values = list(model.state_dict().values())
+    while values:
+        value = values.pop()
+        if isinstance(value, (tuple, list)):
+            values.extend(value)
+        elif isinstance(value, torch.Tensor) and value.data_ptr() not in seen:
+            seen.add(value.data_ptr())
+            size += value.numel() * value.element_size()
+    return size
+
+
+class ModelRegistry:
+    """Procesowy cache modeli i pipeline'ów z budżetem pamięci i wymianą LRU.
+
+    Wpisy mogą zależeć od innych wpisów (np. pipeline od modelu); usunięcie
+    modelu usuwa też wszystkie zbudowane na nim pipeline'y. Ładowanie odbywa się poza
+    wspólną blokadą: inne klucze są dostępne w tym czasie, a kolejne get() tego samego
+    klucza czekają na trwające ładowanie zamiast ładować model drugi raz.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._deps = {}
+        self._loading = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_times = {}
+
+    def get(self, key, loader, size_fn=None, deps=()):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._touch(key)
+                return self._entries[key][0]
+            pending = self._loading.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._loading[key] = Future()
+                loading = True
+            else:
+                self.hits += 1
+                loading = False
+        if not loading:
+            return pending.result()
+
+        try:
+            start = time.perf_counter()
+            value = loader()
+            load_time = time.perf_counter() - start
+            size = size_fn(value) if size_fn else 0
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self.load_times[key] = load_time
+            self._insert(key, value, size, deps)
+            del self._loading[key]
+        pending.set_result(value)
+        return value
+
+    def put(self, key, value, size: int = 0, deps=()):
+        with self._lock:
+            self.remove(key)
+            self._insert(key, value, size, deps)
+
+    def remove(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return
+            del self._entries[key]
+            self._deps.pop(key, None)
+            for dependent in [k for k, d in self._deps.items() if key in d]:
+                self.remove(dependent)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._deps.clear()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def resident_bytes(self) -> int:
+        return sum(size for _, size in self._entries.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "resident_mb": self.resident_bytes() / 2**20,
+                "budget_mb": self.budget_bytes / 2**20,
+                "entries": list(self._entries),
+                "load_times_s": dict(self.load_times),
+            }
+
+    def _touch(self, key):
+        for dep in self._deps.get(key, ()):
+            if dep in self._entries:
+                self._entries.move_to_end(dep)
+        self._entries.move_to_end(key)
+
+    def _insert(self, key, value, size, deps):
+        self._entries[key] = (value, size)
+        self._deps[key] = tuple(deps)
+        self._touch(key)
+        self._evict(protected={key, *deps})
+
+    def _evict(self, protected):
+        while self.resident_bytes() > self.budget_bytes:
+            victim = next((k for k, (_, size) in self._entries.items()
+                           if size and k not in protected), None)
+            if victim is None:
+                print(f"Uwaga: modele zajmują {self.resident_bytes() / 2**20:.0f} MB, "
+                      f"więcej niż budżet {self.budget_bytes / 2**20:.0f} MB")
+                return
+            self.remove(victim)
+            self.evictions += 1
+
+
+registry = ModelRegistry(memory_budget_mb * 2**20)
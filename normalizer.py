@@ -0,0 +1,346 @@
+"""Liniowa normalizacja tekstu ze scrapera (zamiennik wyrażeń regularnych z sanitize_text).
+
+Tekst dzielony jest na naprzemienne ciągi białych i niebiałych znaków. URL-e i e-maile usuwane
+są w obrębie pojedynczych ciągów, a powtórzone domeny, bigramy i słowa zwijane są przez etapy
+przechodzące raz po liście ciągów z małym podglądem do przodu. Wynik jest identyczny z dawną
+sekwencją re.sub (łącznie z jej osobliwościami, np. "ala ala alab" -> "alab"), ale czas jest
+liniowy także dla stron pełnych powtórzonej nawigacji i długich ciągów w rodzaju "a.b-a.b-...".
+"""
+import re
+
+_runs_re = re.compile(r'\s+|\S+')
+_space_re = re.compile(r'\s')
+_url_re = re.compile(r'https?://\S+|www\.\S+')
+# Dawne \S+@\S+ cofało się kwadratowo na długich ciągach bez '@'; tu próbujemy tylko od początku ciągu
+_email_re = re.compile(r'(?<!\S)\S*@\S*')
+# Znaki spoza ASCII, które [a-z] dopasowuje z flagą IGNORECASE
+_extra_domain_letters = frozenset('İıſK')
+kmp_threshold = 32
+
+
+class _NeedMore(Exception):
+    """Etap potrzebuje kolejnych ciągów ze strumienia, żeby rozstrzygnąć dopasowanie."""
+
+
+def _is_word(c):
+    return c.isalnum() or c == '_'
+
+
+def _all_word(text):
+    stripped = text.replace('_', '')
+    return not stripped or stripped.isalnum()
+
+
+def _fold(text):
+    # Porównanie jak w odwołaniach wstecznych re z IGNORECASE: prosta zamiana znak po znaku,
+    # bez reguł kontekstowych str.lower() (sigma końcowa, dwuznakowe "İ")
+    if 'İ' in text or 'Σ' in text:
+        text = text.replace('İ', 'i').replace('Σ', 'σ')
+    return text.lower()
+
+
+def _is_domain_letter(c):
+    return ('a' <= c <= 'z') or ('A' <= c <= 'Z') or c in _extra_domain_letters
+
+
+def _trailing_word_start(tok):
+    if _all_word(tok):
+        return 0
+    i = len(tok)
+    while i > 0 and _is_word(tok[i - 1]):
+        i -= 1
+    return i
+
+
+def _at(runs, k, final):
+    if k < len(runs):
+        return runs[k]
+    if final:
+        return None
+    raise _NeedMore
+
+
+def _has(runs, k, final):
+    # Czy runs[k] istnieje; w środku strumienia brak oznacza czekanie na następną partię
+    if k < len(runs):
+        return True
+    if final:
+        return False
+    raise _NeedMore
+
+
+def _drop_email(m):
+    token = m.group()
+    return ' ' if token.find('@', 1, len(token) - 1) != -1 else token
+
+
+def _strip_links(text):
+    # https?://\S+|www\.\S+ -> ' ', potem \S+@\S+ -> ' '; oba dopasowania nie wychodzą poza ciąg niebiałych znaków
+    if '://' in text or 'www.' in text:
+        text = _url_re.sub(' ', text)
+    if '@' in text:
+        text = _email_re.sub(_drop_email, text)
+    return text
+
+
+def _run_batches(pieces):
+    """Kawałki tekstu -> listy kompletnych ciągów po usunięciu URL-i i e-maili.
+
+    Tekst tniemy przed ostatnim ciągiem białych znaków, więc każdy ciąg niebiałych znaków trafia
+    do _strip_links w całości; ostatni ciąg partii czeka na następną (może się z nią skleić)."""
+    parts, held = [], ""
+    for piece in pieces:
+        if not piece:
+            continue
+        parts.append(piece)
+        if not _space_re.search(piece):
+            continue
+        text = "".join(parts)
+        cut = len(text)
+        while cut > 0 and not text[cut - 1].isspace():
+            cut -= 1
+        while cut > 0 and text[cut - 1].isspace():
+            cut -= 1
+        parts = [text[cut:]]
+        if cut:
+            runs = _runs_re.findall(held + _strip_links(text[:cut]))
+            held = runs.pop()
+            if runs:
+                yield runs
+    runs = _runs_re.findall(held + _strip_links("".join(parts)))
+    if runs:
+        yield runs
+
+
+def _suffix_prefix_lengths(tok, nxt):
+    # Długości L, dla których tok[-L:] == nxt[:L] (prefiks-funkcja KMP na nxt + separator + tok)
+    seq = list(nxt) + [None] + list(tok)
+    pi = [0] * len(seq)
+    for i in range(1, len(seq)):
+        k = pi[i - 1]
+        while k and seq[i] != seq[k]:
+            k = pi[k - 1]
+        if seq[i] == seq[k]:
+            k += 1
+        pi[i] = k
+    lengths, k = [], pi[-1]
+    while k:
+        lengths.append(k)
+        k = pi[k - 1]
+    return lengths
+
+
+def _domain_unit(runs, i, lo, final):
+    # (\b[\w\-.]+(?:\.[a-z]{2,})(?:\.[a-z]{2,})*\b)(?:\s+\1)+ : grupa musi kończyć się na końcu ciągu
+    # (po niej są białe znaki), więc jest sufiksem tok; wybieramy najwcześniejszy start z powtórzeniem
+    tok = runs[i]
+    dot = tok.rfind('.')
+    if dot < 1 or len(tok) - dot < 3 or not all(_is_domain_letter(c) for c in tok[dot + 1:]):
+        return None
+    if not _has(runs, i + 2, final):
+        return None
+    start = len(tok)
+    while start > 0 and (tok[start - 1] in '-.' or _is_word(tok[start - 1])):
+        start -= 1
+    start = max(start, lo)
+    candidates = [p for p in range(start, dot)
+                  if (p > 0 and _is_word(tok[p - 1])) != _is_word(tok[p])]
+    if not candidates:
+        return None
+
+    folded_tok, folded_next = _fold(tok), _fold(runs[i + 2])
+    if len(candidates) > kmp_threshold:
+        allowed = set(candidates)
+        starts = [len(tok) - n for n in _suffix_prefix_lengths(folded_tok, folded_next)]
+        starts = [p for p in starts if p in allowed]
+        return ([tok[min(starts):]], 0) if starts else None
+    for p in candidates:
+        if folded_next.startswith(folded_tok[p:]):
+            return [tok[p:]], 0
+    return None
+
+
+def _word_unit(runs, i, lo, final):
+    # \b(\w+)(?:\s+\1){2,} : ostatni ciąg znaków słownych, bezpośrednio przed białymi znakami
+    tok = runs[i]
+    if not _has(runs, i + 2, final) or not _is_word(tok[-1]):
+        return None
+    start = _trailing_word_start(tok)
+    if start < lo:
+        return None
+    word = tok[start:] if start else tok
+    # Szybkie odrzucenie przed pełnym sprawdzeniem powtórzeń: następny ciąg musi zaczynać się od słowa
+    head = runs[i + 2][:len(word)]
+    if head != word and _fold(head) != _fold(word):
+        return None
+    return [word], 0
+
+
+def _bigram_unit(runs, i, lo, final):
+    # (\b\w+\b(?:\s+\b\w+\b))(?:\s+\1){2,} : ostatnie słowo tok, dokładnie ten sam odstęp i całe słowo po nim
+    if not _has(runs, i + 4, final):
+        return None
+    tok, third = runs[i], runs[i + 4]
+    if not tok.endswith(third) or not _is_word(tok[-1]) or not _all_word(runs[i + 2]):
+        return None
+    start = _trailing_word_start(tok)
+    if start < lo or third != tok[start:]:
+        return None
+    return [third, runs[i + 1], runs[i + 2]], 2
+
+
+def _repetition(runs, j, unit, target, fold, final):
+    # Jedno powtórzenie "\s+" + unit od runs[j] (białe znaki); ostatni element może być prefiksem ciągu
+    end = j + len(unit)
+    if end < len(runs):
+        if len(unit) > 1 and runs[j + 1:end] != unit[:-1]:
+            return None
+    else:
+        if _at(runs, j, final) is None:
+            return None
+        for k, piece in enumerate(unit[:-1], j + 1):
+            run = _at(runs, k, final)
+            if run is None or run != piece:
+                return None
+        if _at(runs, end, final) is None:
+            return None
+    run = runs[end]
+    head = run[:len(target)]
+    if (fold(head) if fold else head) != target:
+        return None
+    return "full" if len(run) == len(target) else "partial"
+
+
+class _Collapse:
+    """Zastępuje unit(\\s+unit){min_reps,} samym unit, jak re.sub z odwołaniem wstecznym.
+
+    Przyjmuje kolejne partie ciągów (feed) i pamięta stan między nimi: nieprzetworzone ciągi,
+    niedokończony ciąg wyjściowy (pending), przesunięcie lo po dopasowaniu kończącym się w środku
+    ciągu (powtórzenie jako prefiks dłuższego słowa) i trwające pomijanie powtórzeń (chain)."""
+
+    def __init__(self, find_unit, min_reps, fold=None):
+        self.find_unit = find_unit
+        self.min_reps = min_reps
+        self.fold = fold
+        self.buffer = []
+        self.pending = []
+        self.lo = 0
+        self.chain = None
+
+    def feed(self, runs, final=False):
+        runs = self.buffer + runs if self.buffer else runs
+        find_unit, min_reps, fold = self.find_unit, self.min_reps, self.fold
+        out, pending, lo, chain = [], self.pending, self.lo, self.chain
+        i, n = 0, len(runs)
+        try:
+            while True:
+                if chain is not None:
+                    unit, target = chain
+                    last = _repetition(runs, i, unit, target, fold, final)
+                    if last is None:
+                        chain = None
+                    elif last == "partial":
+                        i += len(unit)
+                        lo, chain = len(target), None
+                    else:
+                        i += len(unit) + 1
+                    continue
+                if i >= n:
+                    break
+                text = runs[i]
+                if text[0].isspace():
+                    if pending:
+                        out.append("".join(pending))
+                        pending = []
+                    out.append(text)
+                    i += 1
+                    continue
+
+                found = find_unit(runs, i, lo, final)
+                if found is not None:
+                    unit, tail = found
+                    target = fold(unit[-1]) if fold else unit[-1]
+                    count, j = 0, i + 1 + tail
+                    while count < min_reps:
+                        last = _repetition(runs, j, unit, target, fold, final)
+                        if last is None:
+                            break
+                        count += 1
+                        j += 1 + len(unit)
+                        if last == "partial":
+                            break
+                    if count < min_reps:
+                        found = None
+
+                pending.append(text[lo:] if lo else text)
+                lo = 0
+                i += 1
+                if found is None:
+                    continue
+                for text in runs[i:i + tail]:
+                    if text[0].isspace():
+                        out.append("".join(pending))
+                        out.append(text)
+                        pending = []
+                    else:
+                        pending.append(text)
+                i += tail
+                chain = (unit, target)
+        except _NeedMore:
+            pass
+
+        self.buffer = runs[i:]
+        self.lo, self.chain = lo, chain
+        if final and pending:
+            out.append("".join(pending))
+            pending = []
+        self.pending = pending
+        return out
+
+
+def _stages(collapse_domains=True):
+    stages = [_Collapse(_domain_unit, 1, _fold)] if collapse_domains else []
+    return stages + [_Collapse(_bigram_unit, 2), _Collapse(_word_unit, 2, _fold)]
+
+
+def _feed(stages, runs, final):
+    for stage in stages:
+        runs = stage.feed(runs, final)
+    return runs
+
+
+def _process(batches, stages):
+    # Generator list ciągów wyjściowych; ostatnia partia przechodzi przez etapy z final=True
+    previous = None
+    for runs in batches:
+        if previous is not None:
+            yield _feed(stages, previous, False)
+        previous = runs
+    yield _feed(stages, previous or [], True)
+
+
+def normalize_stream(pieces):
+    """Generator słów znormalizowanego tekstu; pieces to kolejne kawałki jednego tekstu
+    (wynik jak normalize("".join(pieces)).split())."""
+    for runs in _process(_run_batches(pieces), _stages()):
+        for text in runs:
+            if not text[0].isspace():
+                yield text
+
+
+def normalize(text):
+    return " ".join(normalize_stream([text]))
+
+
+def normalize_paragraphs(paragraphs):
+    """Normalizuje strumień akapitów niezależnie od siebie, pomijając puste."""
+    for paragraph in paragraphs:
+        normalized = normalize(paragraph)
+        if normalized:
+            yield normalized
+
+
+def collapse_repeats(text):
+    """Tylko zwijanie powtórzonych bigramów i słów, bez zmiany odstępów (końcówka combine_summaries)."""
+    batches = [_runs_re.findall(text)]
+    return "".join("".join(runs) for runs in _process(batches, _stages(collapse_domains=False)))
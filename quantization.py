@@ -0,0 +1,71 @@
+"""Tryb szybki na CPU: dynamiczna kwantyzacja int8 warstw Linear i jawne ustawienie wątków.
+
+Włączany zmienną SUMMARY_CPU_FAST=1 (tylko gdy nie ma GPU). Skwantyzowane wagi zapisywane są
+obok modelu w models/<nazwa>_int8/, więc konwersja odbywa się tylko raz.
+"""
+import os
+import threading
+
+cpu_fast_mode = os.environ.get("SUMMARY_CPU_FAST", "0") == "1"
+cpu_threads = int(os.environ.get("SUMMARY_CPU_THREADS", "0")) or os.cpu_count() or 1
+cpu_interop_threads = int(os.environ.get("SUMMARY_CPU_INTEROP_THREADS", "1"))
+quantized_weights_name = "quantized_state_dict.pt"
+
+_threads_lock = threading.Lock()
+_threads_configured = False
+
+
+def configure_threads():
+    global _threads_configured
+    with _threads_lock:
+        if _threads_configured:
+            return
+        import torch
+        torch.set_num_threads(cpu_threads)
+        try:
+            torch.set_num_interop_threads(cpu_interop_threads)
+        except RuntimeError:
+            # Liczbę wątków inter-op można ustawić tylko przed pierwszą równoległą operacją
+            pass
+        _threads_configured = True
+
+
+def quantize_model(model):
+    import torch
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def quantized_dir(model_name):
+    return os.path.join("models", model_name.replace("/", "_") + "_int8")
+
+
+def load_quantized(model_name, load_fp32):
+    """Zwraca (model_int8, tokenizer); load_fp32() wołane jest tylko przy pierwszej konwersji."""
+    import torch
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer, GenerationConfig
+    configure_threads()
+    local_dir = quantized_dir(model_name)
+    weights_path = os.path.join(local_dir, quantized_weights_name)
+
+    if os.path.exists(weights_path):
+        print(f"Ładuję skwantyzowany model z {local_dir}...")
+        from transformers.modeling_utils import no_init_weights
+        with no_init_weights():
+            model = AutoModelForSeq2SeqLM.from_config(AutoConfig.from_pretrained(local_dir))
+        model = quantize_model(model)
+        # Plik tworzymy sami, a spakowane wagi int8 nie przechodzą przez weights_only
+        model.load_state_dict(torch.load(weights_path, weights_only=False))
+        model.generation_config = GenerationConfig.from_pretrained(local_dir)
+        return model, AutoTokenizer.from_pretrained(local_dir)
+
+    model, tokenizer = load_fp32()
+    print(f"Kwantyzuję {model_name} do int8...")
+    model = quantize_model(model)
+    os.makedirs(local_dir, exist_ok=True)
+    model.config.save_pretrained(local_dir)
+    model.generation_config.save_pretrained(local_dir)
+    tokenizer.save_pretrained(local_dir)
+    tmp_path = weights_path + ".tmp"
+    torch.save(model.state_dict(), tmp_path)
+    os.replace(tmp_path, weights_path)
+    return model, tokenizer
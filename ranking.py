@@ -0,0 +1,117 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+import quantization
+from model_registry import registry, model_size_bytes
+
+embedding_model_name = 'paraphrase-multilingual-MiniLM-L12-v2'
+embedding_cache_size = 20000
+mmr_lambda = 0.7
+
+_embedding_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def load_embedder():
+    from sentence_transformers import SentenceTransformer
+    embedder = SentenceTransformer(embedding_model_name)
+    if quantization.cpu_fast_mode and embedder.device.type == "cpu":
+        quantization.configure_threads()
+        embedder = quantization.quantize_model(embedder)
+    return embedder
+
+
+def get_embedder():
+    return registry.get(embedding_model_name, load_embedder, size_fn=model_size_bytes)
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def embed(texts):
+    keys = [_text_key(t) for t in texts]
+    vectors = {}
+    with _cache_lock:
+        for key in keys:
+            if key in _embedding_cache:
+                _embedding_cache.move_to_end(key)
+                vectors[key] = _embedding_cache[key]
+
+    missing = {k: t for k, t in zip(keys, texts) if k not in vectors}
+    metrics.count("embedding_cache_hits", len(vectors))
+    metrics.count("embedding_cache_misses", len(missing))
+    if missing:
+        with metrics.span("embed", texts=len(missing)):
+            encoded = get_embedder().encode(list(missing.values()), convert_to_numpy=True,
+                                            normalize_embeddings=True)
+        with _cache_lock:
+            for key, vector in zip(missing, encoded):
+                vectors[key] = vector
+                _embedding_cache[key] = vector
+            while len(_embedding_cache) > embedding_cache_size:
+                _embedding_cache.popitem(last=False)
+
+    return np.stack([vectors[k] for k in keys])
+
+
+def truncate_to_sentence(text: str, limit: int) -> str:
+    cut_pos = text.rfind('. ', 0, limit)
+    if cut_pos == -1:
+        return text[:limit].rstrip()
+    return text[:cut_pos + 1].rstrip()
+
+
+def mmr_select(texts, embeddings, max_length, min_length, lambda_=None):
+    """Wybiera fragmenty metodą MMR (trafność względem centroidu minus podobieństwo do już wybranych),
+    pakując je w limit max_length znaków. Zwraca listę (indeks, tekst) w kolejności dokumentu."""
+    lambda_ = mmr_lambda if lambda_ is None else lambda_
+    n = len(texts)
+    if n == 0:
+        return []
+
+    similarity = embeddings @ embeddings.T
+    centroid = embeddings.mean(axis=0)
+    centroid /= np.linalg.norm(centroid) or 1.0
+    relevance = embeddings @ centroid
+
+    lengths = np.array([len(t) for t in texts])
+    available = np.ones(n, dtype=bool)
+    redundancy = np.zeros(n)
+    selected = {}
+    current_len = 0
+
+    while available.any():
+        separator = 1 if selected else 0
+        scores = lambda_ * relevance - (1 - lambda_) * redundancy
+        fits = available & (current_len + separator + lengths <= max_length)
+
+        if not fits.any():
+            if current_len < min_length:
+                best_idx = int(np.where(available, scores, -np.inf).argmax())
+                candidate = truncate_to_sentence(texts[best_idx], max_length - current_len - separator)
+                if candidate:
+                    selected[best_idx] = candidate
+            break
+
+        best_idx = int(np.where(fits, scores, -np.inf).argmax())
+        selected[best_idx] = texts[best_idx]
+        current_len += separator + lengths[best_idx]
+        available[best_idx] = False
+        np.maximum(redundancy, similarity[best_idx], out=redundancy)
+
+        if current_len >= min_length:
+            break
+
+    return sorted(selected.items())
+
+
+def select_summaries(summaries, max_length, min_length, lambda_=None):
+    embeddings = embed(summaries)
+    with metrics.span("select", candidates=len(summaries)):
+        selected = mmr_select(summaries, embeddings, max_length, min_length, lambda_)
+    return " ".join(text for _, text in selected).strip()
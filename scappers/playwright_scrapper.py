@@ -1,40 +1,179 @@
-from playwright.sync_api import sync_playwright
-from readability import Document
+import asyncio
+import atexit
+import re
+import threading
+
 from bs4 import BeautifulSoup
-import time
 
-headless = False
+headless = True
+pool_size = 4
+pages_per_context = 25
+ready_selector = "article, main, h1"
+ready_timeout = 5000
+# Maksymalny czas czekania na wolny kontekst z puli (s)
+acquire_timeout = 60
+
+blocked_resource_types = {"image", "font", "media"}
+blocked_hosts = re.compile(
+    r"(doubleclick|googlesyndication|google-analytics|googletagmanager|googleadservices|adservice"
+    r"|facebook\.net|connect\.facebook|hotjar|scorecardresearch|gemius|criteo|taboola|outbrain"
+    r"|adnxs|smartadserver|rubiconproject|pubmatic|openx|adform|quantserve|chartbeat)\."
+)
+
+cookie_button_selectors = [
+    'button:has-text("Akceptuj")',
+    'div.tvp-covl__ab',
+    'button:has-text("Accept")',
+    'button:has-text("Przejdź")',
+    'button:has-text("PRZEJDŹ")',
+    'button.cookie-consent__agree',
+    'button#onetrust-accept-btn-handler',
+    '.js-accept-cookies'
+]
+
+
+async def _block_unneeded(route):
+    request = route.request
+    if request.resource_type in blocked_resource_types or blocked_hosts.search(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
 
-def extract_article_text(url: str, timeout=10000) -> str:
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        page = browser.new_page()
 
-        page.goto(url, timeout=timeout, wait_until="domcontentloaded")
-        print("Page loaded")
-        time.sleep(2)
+async def _wait_until_ready(page, timeout):
+    try:
+        await page.wait_for_selector(ready_selector, state="attached", timeout=timeout)
+    except Exception:
         try:
-            cookie_button_selectors = [
-                'button:has-text("Akceptuj")',
-                'div.tvp-covl__ab',
-                'button:has-text("Accept")',
-                'button:has-text("Przejdź")',
-                'button:has-text("PRZEJDŹ")',
-                'button.cookie-consent__agree',
-                'button#onetrust-accept-btn-handler',
-                '.js-accept-cookies'
-            ]
-            for selector in cookie_button_selectors:
-                if page.locator(selector).count() > 0:
-                    page.click(selector)
-                    time.sleep(1)
-                    break
+            await page.wait_for_load_state("networkidle", timeout=timeout)
+        except Exception:
+            pass
+
+
+async def _accept_cookies(page):
+    for selector in cookie_button_selectors:
+        try:
+            button = page.locator(selector).first
+            if await button.count() > 0:
+                await button.click(timeout=2000)
+                await button.wait_for(state="hidden", timeout=2000)
+                return
         except Exception as e:
-            print("Nie znaleziono przycisku cookies:", e)       
+            print("Nie udało się zamknąć okna cookies:", e)
+            return
+
+
+class _ContextSlot:
+    """Miejsce w puli; context None oznacza kontekst do utworzenia przy następnym użyciu."""
+
+    def __init__(self):
+        self.context = None
+        self.generation = None
+        self.pages_served = 0
+
+
+class BrowserPool:
+    """Jedna przeglądarka Chromium z pulą kontekstów wielokrotnego użytku.
+
+    Kontekst jest zamykany po `recycle_after` stronach albo po błędzie i tworzony od nowa
+    przy następnym użyciu miejsca w puli; miejsce zawsze wraca do kolejki. Przeglądarka,
+    która przestała działać, jest uruchamiana ponownie.
+    """
+
+    def __init__(self, size=None, recycle_after=None):
+        self.size = size or pool_size
+        self.recycle_after = recycle_after or pages_per_context
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = None
+        self._generation = 0
+        self._slots = None
+
+    async def start(self):
+        from playwright.async_api import async_playwright
+        self._playwright = await async_playwright().start()
+        self._browser_lock = asyncio.Lock()
+        await self._ensure_browser()
+        self._slots = asyncio.Queue()
+        for _ in range(self.size):
+            self._slots.put_nowait(_ContextSlot())
+        return self
+
+    async def _ensure_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._browser is not None:
+                print("Przeglądarka przestała działać, uruchamiam ją ponownie")
+            self._browser = await self._playwright.chromium.launch(headless=headless)
+            self._generation += 1
+
+    async def _prepare(self, slot):
+        await self._ensure_browser()
+        if slot.context is None or slot.generation != self._generation:
+            slot.context = None
+            context = await self._browser.new_context()
+            await context.route("**/*", _block_unneeded)
+            slot.context, slot.generation, slot.pages_served = context, self._generation, 0
+
+    async def _discard(self, slot):
+        context, slot.context = slot.context, None
+        if context is not None:
+            try:
+                await context.close()
+            except Exception as e:
+                print("Nie udało się zamknąć kontekstu przeglądarki:", e)
+
+    async def fetch_html(self, url, timeout=10000):
+        try:
+            slot = await asyncio.wait_for(self._slots.get(), acquire_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Brak wolnego kontekstu przeglądarki po {acquire_timeout} s")
+        try:
+            await self._prepare(slot)
+            page = await slot.context.new_page()
+            try:
+                await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+                await _wait_until_ready(page, min(ready_timeout, timeout))
+                await _accept_cookies(page)
+                return await page.content()
+            finally:
+                slot.pages_served += 1
+                await page.close()
+        except BaseException:
+            # Kontekst po błędzie może być uszkodzony (np. po awarii Chromium); powstanie nowy
+            await self._discard(slot)
+            raise
+        finally:
+            try:
+                if slot.pages_served >= self.recycle_after:
+                    await self._discard(slot)
+            finally:
+                self._slots.put_nowait(slot)
+
+    async def extract(self, url, timeout=10000):
+        return html_to_text(await self.fetch_html(url, timeout))
+
+    async def extract_many(self, urls, timeout=10000):
+        async def extract_or_none(url):
+            try:
+                return await self.extract(url, timeout)
+            except Exception as e:
+                print(f"Nie udało się pobrać {url}: {e}")
+                return None
 
-        html = page.content()
-        browser.close()
+        return await asyncio.gather(*(extract_or_none(url) for url in urls))
 
+    async def close(self):
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._browser = self._playwright = None
+
+
+def html_to_text(html: str) -> str:
+    from readability import Document
     doc = Document(html)
     article_html = doc.summary()
 
@@ -44,3 +183,55 @@ def extract_article_text(url: str, timeout=10000) -> str:
         tag.decompose()
 
     return soup.get_text(separator=" ", strip=True)
+
+
+# Synchroniczne API: jedna pula żyje na pętli asyncio w osobnym wątku
+_loop = None
+_pool = None
+_pool_lock = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="playwright-pool", daemon=True).start()
+    return _loop
+
+
+async def _shared_pool():
+    global _pool, _pool_lock
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await BrowserPool().start()
+    return _pool
+
+
+def _run(coro_fn):
+    async def with_pool():
+        return await coro_fn(await _shared_pool())
+    return asyncio.run_coroutine_threadsafe(with_pool(), _background_loop()).result()
+
+
+def extract_article_text(url: str, timeout=10000) -> str:
+    return _run(lambda pool: pool.extract(url, timeout))
+
+
+def fetch_article_html(url: str, timeout=10000) -> str:
+    return _run(lambda pool: pool.fetch_html(url, timeout))
+
+
+def extract_articles(urls, timeout=10000):
+    return _run(lambda pool: pool.extract_many(urls, timeout))
+
+
+@atexit.register
+def shutdown():
+    global _pool
+    if _pool is not None and _loop is not None:
+        asyncio.run_coroutine_threadsafe(_pool.close(), _loop).result(timeout=10)
+        _pool = None
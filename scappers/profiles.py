@@ -0,0 +1,180 @@
+"""Profile stron: skąd w HTML-u brać tekst artykułu.
+
+Profile są danymi (site_profiles.json): domeny, typ ekstrakcji i reguły. Typy:
+  jsonld       - headline i articleBody z bloków <script type="application/ld+json">,
+                 wyszukiwanych w surowym HTML-u bez budowania drzewa całej strony,
+  css          - tytuł, lead i akapity wskazane tagiem i klasą; parser buduje tylko poddrzewa
+                 pasujące do reguł (SoupStrainer),
+  readability  - ogólny ekstraktor readability-lxml.
+Profil może wskazać "fallback", używany gdy główny typ nic nie znajdzie. Nowa strona to nowy
+wpis w JSON-ie (i fikstura w benchmarks/fixtures/<name>.html dla bench_profiles).
+"""
+import html as _html
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import UnicodeDammit
+
+profiles_path = os.environ.get(
+    "SCRAPER_PROFILES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "site_profiles.json"))
+
+_jsonld_re = re.compile(
+    r'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>', re.I | re.S)
+_comment_re = re.compile(r'^\s*<!--|-->\s*$')
+
+
+def _as_text(content):
+    if isinstance(content, bytes):
+        return UnicodeDammit(content, is_html=True).unicode_markup
+    return content
+
+
+def _find_kwargs(rule):
+    # Brak "class" to dowolna klasa; "" to (jak w bs4) tylko pusty atrybut class
+    return {"class_": rule["class"]} if "class" in rule else {}
+
+
+def _clean_html_fragment(fragment):
+    unescaped = _html.unescape(fragment)
+    if "<" in unescaped:
+        unescaped = BeautifulSoup(unescaped, "html.parser").get_text(separator="\n", strip=True)
+    return "\n\n".join(line.strip() for line in unescaped.splitlines() if line.strip())
+
+
+def _jsonld_objects(payload):
+    stack = [payload]
+    while stack:
+        item = stack.pop(0)
+        if isinstance(item, list):
+            stack[:0] = item
+        elif isinstance(item, dict):
+            yield item
+            if isinstance(item.get("@graph"), list):
+                stack[:0] = item["@graph"]
+
+
+def extract_jsonld(profile, content):
+    title = None
+    for match in _jsonld_re.finditer(_as_text(content)):
+        try:
+            payload = json.loads(_comment_re.sub("", match.group(1)))
+        except ValueError:
+            continue
+        for obj in _jsonld_objects(payload):
+            title = obj.get("headline") or title
+            body = obj.get("articleBody")
+            if isinstance(body, str) and body.strip():
+                text = _clean_html_fragment(body)
+                return f"{title}. {text}" if title else text
+    return None
+
+
+def extract_css(profile, content):
+    soup = BeautifulSoup(content, "html.parser", parse_only=profile.strainer)
+    parts = []
+    for key in ("title", "lead"):
+        rule = profile.spec.get(key)
+        element = soup.find(rule["tag"], **_find_kwargs(rule)) if rule else None
+        if element is not None:
+            parts.append(element.get_text())
+
+    body_rule, paragraph_rule = profile.spec["body"], profile.spec.get("paragraph", {"tag": "p"})
+    body = soup.find(body_rule["tag"], **_find_kwargs(body_rule))
+    paragraphs = []
+    if body is not None:
+        skip = profile.spec.get("skip_containing", [])
+        for p in body.find_all(paragraph_rule["tag"], **_find_kwargs(paragraph_rule)):
+            text = p.get_text()
+            if any(marker in text for marker in skip):
+                continue
+            if profile.spec.get("skip_link_only"):
+                link = p.find("a")
+                if link is not None and text == link.get_text():
+                    continue
+            paragraphs.append(text)
+    if not paragraphs:
+        return None
+    return " ".join(parts + [" ".join(paragraphs)])
+
+
+def extract_readability(profile, content):
+    from scappers.playwright_scrapper import html_to_text
+    return html_to_text(content) or None
+
+
+extractors = {
+    "jsonld": extract_jsonld,
+    "css": extract_css,
+    "readability": extract_readability,
+}
+
+
+class SiteProfile:
+    def __init__(self, spec):
+        for key in ("type", "fallback"):
+            if spec.get(key) is not None and spec[key] not in extractors:
+                raise ValueError(f"Profil {spec.get('name')}: nieznany typ ekstrakcji {spec[key]!r}")
+        self.spec = spec
+        self.name = spec["name"]
+        self.domains = [d.lower() for d in spec.get("domains", [])]
+        self.type = spec["type"]
+        self.fallback = spec.get("fallback")
+        self.strainer = self._strainer() if self.type == "css" else None
+
+    def _strainer(self):
+        # Parser zachowuje tylko elementy z reguł i ich poddrzewa; akapity są wewnątrz "body"
+        rules = [self.spec[key] for key in ("title", "lead", "body") if self.spec.get(key)]
+        tags = sorted({rule["tag"] for rule in rules})
+        if all(rule.get("class") for rule in rules):
+            return SoupStrainer(tags, class_=sorted({rule["class"] for rule in rules}))
+        return SoupStrainer(tags)
+
+    def extract(self, content):
+        text = extractors[self.type](self, content)
+        if not text and self.fallback:
+            text = extractors[self.fallback](self, content)
+        return text
+
+
+class ProfileRegistry:
+    def __init__(self, specs):
+        self.profiles = [SiteProfile(spec) for spec in specs]
+        defaults = [p for p in self.profiles if p.spec.get("default")]
+        self.default = defaults[0] if defaults else SiteProfile({"name": "readability", "type": "readability"})
+        # Jedno wyrażenie dla wszystkich domen; grupa o nazwie p<i> wskazuje profil
+        alternatives = [f"(?P<p{i}>{'|'.join(re.escape(d) for d in p.domains)})"
+                        for i, p in enumerate(self.profiles) if p.domains]
+        self._domain_re = re.compile(rf"(?:^|\.)(?:{'|'.join(alternatives)})$") if alternatives else None
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, url):
+        host = urlsplit(url if "//" in url else "//" + url).hostname or ""
+        m = self._domain_re.search(host) if self._domain_re else None
+        return self.profiles[int(m.lastgroup[1:])] if m else self.default
+
+    def extract(self, url, content):
+        return self.match(url).extract(content)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProfileRegistry.from_file(profiles_path)
+    return _registry
+
+
+def extract_text(url, content):
+    return get_registry().extract(url, content)
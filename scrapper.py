@@ -1,28 +1,26 @@
-import re
-import requests
+import os
 
-from scappers import tvpinfo, sportowefakty, generic_scrapper, playwright_scrapper
+import fetcher
+import tiered_fetch
+from scappers import playwright_scrapper, profiles
 
-use_playwright = True
+# tiered: statycznie, a przeglądarka tylko gdy tekst jest słaby; static: bez przeglądarki;
+# browser: zawsze Playwright
+fetch_mode = os.environ.get("SCRAPER_FETCH_MODE", "tiered")
+
+def extract_text(url: str, content):
+    # Wybór sposobu ekstrakcji według domeny: scappers/site_profiles.json
+    return profiles.extract_text(url, content)
 
 def scrape_text_from_url(url: str):
-    if use_playwright:
+    if fetch_mode == "browser":
         return playwright_scrapper.extract_article_text(url)
 
-    try:
-        response = requests.get(url)
-    except Exception:
-        return None
+    if fetch_mode == "tiered":
+        return tiered_fetch.scrape(url)
 
-    if response.status_code != 200:
+    content = fetcher.fetch(url)
+    if content is None:
         return None
 
-    content = response.content
-
-    if re.search(r'^(?:https?://)?(?:www\.)?tvp\.info', url):
-        return tvpinfo.scrape_text_from_content(content)
-
-    if re.search(r'sportowefakty', url):
-        return sportowefakty.scrape_text_from_content(content)
-
-    return generic_scrapper.scrape_text_from_content(content)
\ No newline at end of file
+    return extract_text(url, content)
\ No newline at end of file
@@ -0,0 +1,373 @@
+"""Lokalny serwer HTTP do streszczania z modelami trzymanymi w pamięci.
+
+    python server.py --port 8765
+    python server.py --tiny --static      # małe modele z benchmarks/, bez sieci i Playwrighta
+
+Z --tiny adresy z benchmarks.bench.FIXTURE_URLS pobierane są z lokalnego serwera fikstur
+(benchmarks.fixture_server), więc /summarize_url działa offline dla tych adresów.
+
+POST /summarize      {"text": "...", "model": "...", "max_length": 2000, "min_length": 1500, "deadline_s": 60,
+                      "profile": "balanced"}
+POST /summarize_url  {"url": "https://...", ...}
+GET  /metrics        liczniki i czasy etapów (Prometheus), w tym głębokość kolejki
+GET  /health
+
+Chunki z równoległych żądań trafiają do wspólnej kolejki; BatchScheduler czeka do
+batch_window_ms na kolejne chunki z tym samym modelem i limitami długości i wysyła je
+do generate() jedną partią.
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import decoding
+import fetcher
+import metrics
+import scrapper
+import summarizer
+
+host = "127.0.0.1"
+port = 8765
+batch_window_ms = 20
+max_batch_size = 8
+max_queued_chunks = 256
+default_deadline_s = 120
+max_body_bytes = 4 * 2**20
+
+
+class QueueFull(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class _Job:
+    __slots__ = ("key", "summarizer", "text", "gen_kwargs", "deadline", "enqueued", "future")
+
+    def __init__(self, key, summarizer, text, gen_kwargs, deadline):
+        self.key = key
+        self.summarizer = summarizer
+        self.text = text
+        self.gen_kwargs = gen_kwargs
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.future = Future()
+
+
+class BatchScheduler:
+    """Łączy chunki z wielu żądań we wspólne partie generate().
+
+    Partię wysyła, gdy uzbiera max_batch chunków o tym samym kluczu albo gdy najstarszy
+    chunk czeka dłużej niż window_s. Chunki po terminie są odrzucane bez generowania.
+    """
+
+    def __init__(self, window_s=None, max_batch=None, max_queued=None):
+        self.window_s = batch_window_ms / 1000 if window_s is None else window_s
+        self.max_batch = max_batch or max_batch_size
+        self.max_queued = max_queued or max_queued_chunks
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._thread.start()
+
+    def depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def submit(self, model_name, summarizer_fn, tokenizer, chunks, token_counts=None, deadline=None, profile=None):
+        if token_counts is None:
+            token_counts = [summarizer.count_tokens(tokenizer, ch) for ch in chunks]
+        jobs = []
+        for chunk, n_tokens in zip(chunks, token_counts):
+            if getattr(summarizer_fn, "handles_batching", False):
+                key, gen_kwargs = (model_name, profile), {"profile": profile}
+            else:
+                gen_kwargs = summarizer.chunk_gen_kwargs(n_tokens, profile=profile)
+                key = (model_name, gen_kwargs["max_length"], gen_kwargs["min_length"], gen_kwargs["num_beams"])
+            jobs.append(_Job(key, summarizer_fn, chunk, gen_kwargs, deadline))
+
+        with self._cond:
+            if len(self._pending) + len(jobs) > self.max_queued:
+                metrics.count("rejected_requests")
+                raise QueueFull(f"Kolejka pełna ({len(self._pending)} chunków)")
+            self._pending.extend(jobs)
+            self._cond.notify()
+        return [job.future for job in jobs]
+
+    def generate_fn(self, model_name, deadline=None):
+        """Zamiennik summarize_chunks dla summarize_text_chunks(generate=...)."""
+        def generate(summarizer_fn, tokenizer, chunks, token_counts=None, on_chunk=None, cancel=None, profile=None, **_):
+            futures = self.submit(model_name, summarizer_fn, tokenizer, chunks, token_counts, deadline, profile)
+            results = []
+            try:
+                for i, future in enumerate(futures):
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    results.append(future.result(timeout))
+                    if on_chunk:
+                        on_chunk(i, len(chunks), results[-1])
+            except FutureTimeout:
+                raise DeadlineExceeded("Przekroczono termin żądania")
+            finally:
+                for future in futures:
+                    future.cancel()
+            return results
+        return generate
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            first = self._pending[0]
+            flush_at = first.enqueued + self.window_s
+            while True:
+                batch = [job for job in self._pending if job.key == first.key][:self.max_batch]
+                remaining = flush_at - time.monotonic()
+                if len(batch) >= self.max_batch or remaining <= 0 or self._closed:
+                    break
+                self._cond.wait(remaining)
+            taken = set(map(id, batch))
+            self._pending = [job for job in self._pending if id(job) not in taken]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            now = time.monotonic()
+            live = []
+            for job in batch:
+                # Anulowane (np. klient przekroczył termin) pomijamy bez generowania
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                if job.deadline is not None and now >= job.deadline:
+                    job.future.set_exception(DeadlineExceeded("Chunk nie zdążył przed terminem"))
+                    metrics.count("expired_chunks")
+                else:
+                    live.append(job)
+            if not live:
+                continue
+
+            metrics.count("batches")
+            metrics.count("batched_chunks", len(live))
+            gen_kwargs = live[0].gen_kwargs
+            try:
+                start = time.perf_counter()
+                with metrics.span("generate", batch=len(live), max_length=gen_kwargs.get("max_length")), \
+                        metrics.profiled("generate"):
+                    out = live[0].summarizer([job.text for job in live], batch_size=len(live), **gen_kwargs)
+                if "max_length" in gen_kwargs:
+                    # Pipeline'y z tłumaczeniem (profile w gen_kwargs) mierzą się same w summarize_chunks
+                    decoding.record_throughput(live[0].key[0], decoding.generation_units(gen_kwargs, len(live)),
+                                               time.perf_counter() - start)
+                for job, item in zip(live, out):
+                    job.future.set_result(item["summary_text"])
+            except Exception as e:
+                for job in live:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+
+
+class SummaryService:
+    def __init__(self, scheduler=None, default_model=None):
+        self.scheduler = scheduler or BatchScheduler()
+        self.default_model = default_model or summarizer.polish_models[0]
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def inflight(self):
+        return self._inflight
+
+    def summarize(self, raw_text, model_name=None, max_length=2000, min_length=1500, deadline_s=None, profile=None):
+        model_name = model_name or self.default_model
+        decoding.get_profile(profile)
+        deadline = time.monotonic() + (default_deadline_s if deadline_s is None else deadline_s)
+        with self._lock:
+            self._inflight += 1
+        try:
+            start = time.perf_counter()
+            with metrics.span("sanitize", chars=len(raw_text)):
+                text = summarizer.sanitize_text(raw_text.strip())
+            if not text:
+                raise ValueError("Brak tekstu do streszczenia.")
+
+            cached = summarizer.cached_document_summary(text, model_name, max_length, min_length, profile)
+            metrics.count("document_cache_hits" if cached is not None else "document_cache_misses")
+            if cached is not None:
+                return {"summary": cached, "model": model_name, "profile": profile or decoding.default_profile,
+                        "cached": True,
+                        "elapsed_s": time.perf_counter() - start}
+
+            summaries = summarizer.summarize_text_chunks(
+                text, model_name, generate=self.scheduler.generate_fn(model_name, deadline), profile=profile)
+            result = summarizer.combine_summaries(summaries, max_length, min_length)
+            summarizer.store_document_summary(text, model_name, max_length, min_length, result, profile)
+            return {"summary": result, "model": model_name, "profile": profile or decoding.default_profile,
+                    "cached": False, "chunks": len(summaries),
+                    "elapsed_s": time.perf_counter() - start}
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    def gauges(self):
+        return {"queue_depth": self.scheduler.depth(), "inflight_requests": self.inflight()}
+
+
+def _parse_deadline(value):
+    """deadline_s z żądania: None albo skończona liczba sekund > 0, inaczej ValueError (400)."""
+    if value is None:
+        return None
+    try:
+        deadline_s = math.nan if isinstance(value, bool) else float(value)
+    except (TypeError, ValueError):
+        deadline_s = math.nan
+    if not (math.isfinite(deadline_s) and deadline_s > 0):
+        raise ValueError(f"Niepoprawne deadline_s: {value!r} (oczekiwana liczba sekund > 0)")
+    return deadline_s
+
+
+class SummaryHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", **self.service.gauges()})
+        elif self.path == "/metrics":
+            body = metrics.prometheus_text(self.service.gauges()).encode("utf-8")
+            self._send(200, body, "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_json(404, {"error": "Nie znaleziono"})
+
+    def do_POST(self):
+        if self.path not in ("/summarize", "/summarize_url"):
+            self._send_json(404, {"error": "Nie znaleziono"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > max_body_bytes:
+                self._send_json(413, {"error": "Za duże żądanie"})
+                return
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "Niepoprawny JSON"})
+            return
+
+        try:
+            deadline_s = _parse_deadline(payload.get("deadline_s"))
+            if self.path == "/summarize_url":
+                if not payload.get("url"):
+                    raise ValueError("Brak pola url")
+                with metrics.span("scrape"):
+                    text = scrapper.scrape_text_from_url(payload["url"])
+                if isinstance(text, (list, tuple)):
+                    text = " ".join(t for t in text if t)
+                if not text:
+                    raise ValueError("Nie udało się pobrać treści artykułu")
+            else:
+                text = payload.get("text") or ""
+            result = self.service.summarize(text, payload.get("model"),
+                                            int(payload.get("max_length", 2000)),
+                                            int(payload.get("min_length", 1500)),
+                                            deadline_s,
+                                            payload.get("profile"))
+            self._send_json(200, result)
+        except QueueFull as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": "1"})
+        except DeadlineExceeded as e:
+            self._send_json(504, {"error": str(e)})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"Nieznany błąd: {e}"})
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"),
+                   "application/json; charset=utf-8", headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if summarizer.enable_logs:
+            super().log_message(format, *args)
+
+
+def make_server(service, bind_host=None, bind_port=None):
+    handler = type("BoundSummaryHandler", (SummaryHandler,), {"service": service})
+    server = ThreadingHTTPServer((bind_host or host, port if bind_port is None else bind_port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def install_tiny_models(model_names):
+    from benchmarks import bench, tiny_models
+    texts = [scrapper.extract_text(url, html) or "" for url, html in bench.load_fixtures().values()]
+    tiny_models.install(texts, model_names)
+
+
+def serve_fixtures():
+    from benchmarks import fixture_server
+    server, base_url = fixture_server.start()
+    fetcher.url_rewrites.update(fixture_server.url_map(base_url))
+    print(f"Fikstury HTML pod {base_url}: {', '.join(fetcher.url_rewrites)}")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokalny serwer HTTP do streszczania")
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--model", action="append", help="model do załadowania przy starcie (można powtórzyć)")
+    parser.add_argument("--batch-window-ms", type=float, default=batch_window_ms)
+    parser.add_argument("--max-batch", type=int, default=max_batch_size)
+    parser.add_argument("--max-queue", type=int, default=max_queued_chunks)
+    parser.add_argument("--static", action="store_true", help="pobieraj strony bez Playwrighta")
+    parser.add_argument("--browser", action="store_true", help="pobieraj każdą stronę przez Playwrighta")
+    parser.add_argument("--tiny", action="store_true", help="małe losowe modele z benchmarks/ (testy offline)")
+    args = parser.parse_args(argv)
+
+    models = args.model or [summarizer.polish_models[0]]
+    metrics.enabled = True
+    if args.static:
+        scrapper.fetch_mode = "static"
+    elif args.browser:
+        scrapper.fetch_mode = "browser"
+    if args.tiny:
+        install_tiny_models(models)
+        serve_fixtures()
+    summarizer.preload_models(models)
+
+    service = SummaryService(BatchScheduler(args.batch_window_ms / 1000, args.max_batch, args.max_queue), models[0])
+    server = make_server(service, args.host, args.port)
+    print(f"Serwer nasłuchuje na http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.scheduler.close()
+
+
+if __name__ == "__main__":
+    main()
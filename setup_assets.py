@@ -0,0 +1,71 @@
+"""Jednorazowe pobranie zasobów, których aplikacja potrzebuje offline.
+
+    python setup_assets.py                  # wszystko
+    python setup_assets.py --models --model airKlizz/mt5-base-wikinewssum-polish
+    python setup_assets.py --nltk --browsers
+
+Modele trafiają do models/ (tam szuka ich summarizer.load_model, przy SUMMARY_CPU_FAST=1 także
+wersja int8), model embeddingów i lematyzator do cache bibliotek, dane NLTK (używane przez
+notatnik text_summary.ipynb) do katalogu NLTK, a przeglądarka Playwrighta do jego katalogu.
+Samo uruchomienie GUI, serwera czy scrapera niczego już nie pobiera przy starcie.
+"""
+import argparse
+import subprocess
+import sys
+
+nltk_packages = ["stopwords", "punkt_tab"]
+playwright_browser = "chromium"
+
+
+def setup_nltk():
+    import nltk
+    for package in nltk_packages:
+        if not nltk.download(package, quiet=True):
+            raise RuntimeError(f"Nie udało się pobrać danych NLTK: {package}")
+        print(f"NLTK: {package}")
+
+
+def setup_models(model_names):
+    import ranking
+    import summarizer
+    import textrank
+
+    for model_name in model_names:
+        summarizer.load_model(model_name)
+        print(f"Model: {model_name}")
+    if any(name not in summarizer.polish_models for name in model_names):
+        summarizer.load_model(summarizer.translation_model_name)
+        print(f"Model tłumaczenia: {summarizer.translation_model_name}")
+    ranking.load_embedder()
+    print(f"Model embeddingów: {ranking.embedding_model_name}")
+    textrank.lemma("kotami")
+    print("Lematyzator: morfeusz2")
+
+
+def setup_browsers():
+    subprocess.run([sys.executable, "-m", "playwright", "install", playwright_browser], check=True)
+    print(f"Playwright: {playwright_browser}")
+
+
+def main(argv=None):
+    import summarizer
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nltk", action="store_true", help="dane NLTK (stopwords, punkt_tab)")
+    parser.add_argument("--models", action="store_true", help="modele streszczania, tłumaczenia i embeddingów")
+    parser.add_argument("--browsers", action="store_true", help="przeglądarka dla Playwrighta")
+    parser.add_argument("--model", action="append", help="model streszczania (można powtórzyć; domyślnie model domyślny GUI)")
+    args = parser.parse_args(argv)
+
+    everything = not (args.nltk or args.models or args.browsers)
+    if everything or args.nltk:
+        setup_nltk()
+    if everything or args.models:
+        setup_models(args.model or summarizer.polish_models)
+    if everything or args.browsers:
+        setup_browsers()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
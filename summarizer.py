@@ -1,19 +1,54 @@
 from scrapper import scrape_text_from_url
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-import re
 import os
-import torch
 import time
-from sentence_transformers import SentenceTransformer, util
 import csv
+from model_registry import registry, model_size_bytes
+from translation import TranslationStage
+from ranking import select_summaries
+from chunking import iter_chunks
+from summary_cache import get_cache, make_key
+from normalizer import normalize, collapse_repeats
+import metrics
+import quantization
+import decoding
+import chunking
+import ranking
+import textrank
+import dedup
 
-device = 0 if torch.cuda.is_available() else -1
 polish_models = ['airKlizz/mt5-base-wikinewssum-polish']
 polish_input_models = ['z-dickson/bart-large-cnn-climate-change-summarization']
-max_chunk_chars = 1600
+summary_batch_size = int(os.environ.get("SUMMARY_BATCH_SIZE", "4"))
+length_bucket_tokens = 32
 enable_logs = False
-
-def load_model(model_name):
+translation_model_name = "facebook/nllb-200-distilled-600M"
+use_cache = os.environ.get("SUMMARY_CACHE", "1") != "0"
+warmup_text = "Rząd przedstawił w poniedziałek nowy projekt ustawy o ochronie klimatu."
+
+_device = None
+
+def get_device():
+    # torch i transformers ładowane są dopiero przy pierwszym użyciu modelu, żeby GUI i scraper startowały szybko
+    global _device
+    if _device is None:
+        import torch
+        _device = 0 if torch.cuda.is_available() else -1
+    return _device
+
+class SummaryCancelled(Exception):
+    pass
+
+def check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise SummaryCancelled("Przerwano generowanie streszczenia.")
+
+def load_model(model_name, quantize=None):
+    if quantize is None:
+        quantize = quantization.cpu_fast_mode and get_device() == -1
+    if quantize:
+        return quantization.load_quantized(model_name, lambda: load_model(model_name, quantize=False))
+
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
     local_model_dir = os.path.join("models", model_name.replace("/", "_"))
 
     if not os.path.exists(local_model_dir):
@@ -30,207 +65,398 @@ def load_model(model_name):
 
     return model, tokenizer
 
+def get_model(model_name):
+    def load():
+        with metrics.span("model_load", model=model_name):
+            return load_model(model_name)
+    return registry.get(model_name, load, size_fn=lambda loaded: model_size_bytes(loaded[0]))
+
+def get_translation_stage():
+    def build():
+        translation_model, translation_tokenizer = get_model(translation_model_name)
+        return TranslationStage(translation_model, translation_tokenizer, device=get_device())
+    return registry.get("translation-stage", build, deps=(translation_model_name,))
+
 def translation_pipeline(model_name, input_lang="en"):
-    translation_model, translation_tokenizer = load_model("facebook/nllb-200-distilled-600M")
-    summary_model, summary_tokenizer = load_model(model_name)
-    
-    pl_en = pipeline(
-        "translation",
-        model=translation_model,
-        tokenizer=translation_tokenizer,
-        src_lang="pol_Latn",
-        tgt_lang="eng_Latn",
-        device=device
-    )
+    from transformers import pipeline
+    translator = get_translation_stage()
+    summary_model, summary_tokenizer = get_model(model_name)
+
     en_summarizer = pipeline(
         "summarization",
         model=summary_model,
         tokenizer=summary_tokenizer,
-        device=device
-    )
-    en_pl = pipeline(
-        "translation",
-        model=translation_model,
-        tokenizer=translation_tokenizer,
-        src_lang="eng_Latn",
-        tgt_lang="pol_Latn",
-        device=device
+        device=get_device()
     )
 
-    def summary(text_pl, **gen_kwargs):
-        input_tokens = len(translation_tokenizer.encode(text_pl))
-        if enable_logs:
-            print(f"Input text length: {len(text_pl)}, Tokens: {int(input_tokens)}\n")
-        kwargs = {"max_length": int(input_tokens * 1.2)} 
+    def summary(texts_pl, batch_size=None, profile=None, length_scale=1.0, **gen_kwargs):
+        texts = [texts_pl] if isinstance(texts_pl, str) else list(texts_pl)
 
-        if input_lang=="en":
-            input_text = pl_en(text_pl, **kwargs)[0]["translation_text"]
+        if input_lang == "en":
+            input_texts = translator.translate(texts, "pol_Latn", "eng_Latn")
             if enable_logs:
-                input_tokens = len(translation_tokenizer.encode(input_text))
-                print(f"Translated to English ({len(input_text)} chars), Tokens: {int(input_tokens)}:", input_text[:100], "...\n")
+                print(f"Przetłumaczono {len(texts)} chunków na angielski:", input_texts[0][:100], "...\n")
         else:
-            input_text = text_pl
+            input_texts = texts
 
-        input_tokens = len(summary_tokenizer.encode(input_text))
+        en_summaries = summarize_chunks(en_summarizer, summary_tokenizer, input_texts, batch_size,
+                                        length_floors=(50, 30), profile=profile, length_scale=length_scale)
+        if enable_logs:
+            print(f"Streszczenia po angielsku ({sum(map(len, en_summaries))} znaków):", en_summaries[0][:100], "...\n")
 
-        gen_kwargs = {
-            "max_length": max(50, int(input_tokens * 0.6)),
-            "min_length": max(30, int(input_tokens * 0.4)),
-            "do_sample": False,
-            "num_beams": 4,
-            "no_repeat_ngram_size": 3,
-            "repetition_penalty": 1.1,
-            }
+        pl_summaries = translator.translate(en_summaries, "eng_Latn", "pol_Latn")
+        return [{"summary_text": pl_summary} for pl_summary in pl_summaries]
 
-        en_summary = en_summarizer(
-            input_text,
-            **gen_kwargs
-        )[0]["summary_text"]
+    # Tłumaczenie i tak przetwarza wszystkie chunki naraz, więc summarize_chunks nie dzieli ich na partie
+    summary.handles_batching = True
 
-        output_tokens = len(translation_tokenizer.encode(en_summary))
-        if enable_logs:
-            print(f"English summary ({len(en_summary)} chars), Tokens: {int(output_tokens)}:", en_summary[:100], "...\n")
-        kwargs = {"max_length": int(output_tokens * 1.2)}
+    # Chunkujemy po tokenizerze, który faktycznie koduje polski tekst wejściowy
+    return summary, translator.tokenizer if input_lang == "en" else summary_tokenizer
 
-        pl_summary = en_pl(en_summary, **kwargs)[0]["translation_text"]
-        return [{"summary_text": pl_summary}]
 
-    return summary, summary_tokenizer
+def get_pipeline(model_name):
+    def build():
+        if model_name in polish_models:
+            from transformers import pipeline
+            model, tokenizer = get_model(model_name)
+            summarizer = pipeline("summarization", model=model, tokenizer=tokenizer, device=get_device())
+        else:
+            summarizer, tokenizer = translation_pipeline(model_name, "pl" if model_name in polish_input_models else "en")
+        # Pod tą nazwą partie generowania zapisują przepustowość dla planów terminu (decoding.DeadlinePlan)
+        summarizer.model_name = model_name
+        return summarizer, tokenizer
 
+    deps = (model_name,) if model_name in polish_models else (model_name, translation_model_name)
+    return registry.get(f"pipeline:{model_name}", build, deps=deps)
 
-def get_pipeline(model_name):
-    if model_name in polish_models:
-        model, tokenizer = load_model(model_name)
-        return pipeline("summarization", model=model, tokenizer=tokenizer, device=device), tokenizer
-    else:
-        return translation_pipeline(model_name, "pl" if model_name in polish_input_models else "en")
+def preload_models(model_names, warmup=True):
+    for model_name in model_names:
+        summarizer, tokenizer = get_pipeline(model_name)
+        if warmup:
+            # Przez summarize_chunks, żeby rozgrzewka dała już pierwszy pomiar przepustowości
+            summarize_chunks(summarizer, tokenizer, [warmup_text], length_floors=(20, 5), profile="fast")
+    return registry.stats()
 
 def count_tokens(tokenizer, text):
     return len(tokenizer.encode(text, truncation=False))
 
-def sanitize_text(text: str) -> str:
-    text = re.sub(r'https?://\S+|www\.\S+', ' ', text)
-    text = re.sub(r'\S+@\S+', ' ', text)
-    text = re.sub(r'(\b[\w\-.]+(?:\.[a-z]{2,})(?:\.[a-z]{2,})*\b)(?:\s+\1)+', r'\1', text, flags=re.IGNORECASE)
-    text = re.sub(r'(\b\w+\b(?:\s+\b\w+\b))(?:\s+\1){2,}', r'\1', text)
-    text = re.sub(r'\b(\w+)(?:\s+\1){2,}', r'\1', text, flags=re.IGNORECASE)
-    text = ' '.join(text.split())
-    return text
-
-def get_summary(raw_text, model_name: str, max_length: int, min_length: int = 200) -> str:
-    try:
-        raw_text = (raw_text or "").strip()
-        if not raw_text:
-            return "Brak tekstu do streszczenia."
-
-        print("Długość tekstu wejściowego (znaki):", len(raw_text))
+def chunk_gen_kwargs(input_tokens, length_floors=(60, 40), profile=None, length_scale=1.0):
+    settings = decoding.get_profile(profile)
+
+    # Zaokrąglenie do kubełka, żeby chunki o podobnej długości miały identyczne limity
+    input_tokens = -(-input_tokens // length_bucket_tokens) * length_bucket_tokens
+
+    max_len = max(length_floors[0], int(input_tokens * settings["max_ratio"] * length_scale))
+    min_len = max(length_floors[1], int(input_tokens * settings["min_ratio"] * length_scale))
+
+    if min_len >= max_len:
+        min_len = max(30, max_len - 10)
+
+    return {
+        "max_length": max_len,
+        "min_length": min_len,
+        # Bez tego pipeline dla modeli z domyślną konfiguracją generowania ustawia max_new_tokens=256,
+        # które ma pierwszeństwo przed max_length
+        "max_new_tokens": None,
+        "do_sample": False,
+        "num_beams": settings["num_beams"],
+        "no_repeat_ngram_size": settings["no_repeat_ngram_size"],
+        "repetition_penalty": settings["repetition_penalty"],
+    }
+
+def generate_batch(summarizer, tokenizer, chunks, batch, gen_kwargs, token_counts):
+    start = time.perf_counter()
+    with metrics.span("generate", batch=len(batch), max_length=gen_kwargs["max_length"]), \
+            metrics.profiled("generate"):
+        out = summarizer([chunks[i] for i in batch], batch_size=len(batch), **gen_kwargs)
+    decoding.record_throughput(getattr(summarizer, "model_name", None),
+                               decoding.generation_units(gen_kwargs, len(batch)), time.perf_counter() - start)
+    summaries = [item["summary_text"] for item in out]
+    metrics.count("chunks", len(batch))
+    metrics.count("beams", gen_kwargs["num_beams"] * len(batch))
+    metrics.count("input_tokens", sum(token_counts[i] for i in batch))
+    if metrics.enabled:
+        metrics.count("output_tokens", sum(count_tokens(tokenizer, summary) for summary in summaries))
+    return summaries
+
+def summarize_chunks(summarizer, tokenizer, chunks, batch_size=None, length_floors=(60, 40), token_counts=None,
+                     on_chunk=None, cancel=None, profile=None, length_scale=1.0, plan=None):
+    """Streszcza chunki partiami. on_chunk(indeks, liczba_chunków, streszczenie) jest wołane po każdej
+    partii, a ustawienie zdarzenia cancel przerywa pracę przed następną partią (SummaryCancelled).
+    Z planem terminu (decoding.DeadlinePlan) pominięte chunki mają streszczenie None."""
+    batch_size = batch_size or summary_batch_size
+    if plan is not None:
+        return summarize_chunks_with_deadline(summarizer, tokenizer, chunks, batch_size, length_floors,
+                                              token_counts, on_chunk, cancel, plan)
+
+    if getattr(summarizer, "handles_batching", False):
+        model_name = getattr(summarizer, "model_name", None)
+        if model_name and token_counts is None:
+            token_counts = [count_tokens(tokenizer, ch) for ch in chunks]
+
+        def generate(start, end):
+            started = time.perf_counter()
+            out = summarizer(chunks[start:end], batch_size=batch_size, profile=profile, length_scale=length_scale)
+            if model_name:
+                units = sum(decoding.generation_units(chunk_gen_kwargs(n, length_floors, profile, length_scale))
+                            for n in token_counts[start:end])
+                decoding.record_throughput(model_name, units, time.perf_counter() - started)
+            return [item["summary_text"] for item in out]
+
+        if on_chunk is None and cancel is None:
+            return generate(0, len(chunks))
+        summaries = []
+        for start in range(0, len(chunks), batch_size):
+            check_cancelled(cancel)
+            for summary in generate(start, start + batch_size):
+                summaries.append(summary)
+                if on_chunk:
+                    on_chunk(len(summaries) - 1, len(chunks), summary)
+        return summaries
+
+    if token_counts is None:
+        token_counts = [count_tokens(tokenizer, ch) for ch in chunks]
+
+    buckets = {}
+    for i, n_tokens in enumerate(token_counts):
+        gen_kwargs = chunk_gen_kwargs(n_tokens, length_floors, profile, length_scale)
+        key = (gen_kwargs["max_length"], gen_kwargs["min_length"])
+        buckets.setdefault(key, (gen_kwargs, []))[1].append(i)
+
+    summaries = [None] * len(chunks)
+    for gen_kwargs, indices in buckets.values():
+        indices.sort(key=lambda i: len(chunks[i]))
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            check_cancelled(cancel)
+            for i, summary in zip(batch, generate_batch(summarizer, tokenizer, chunks, batch, gen_kwargs, token_counts)):
+                summaries[i] = summary
+                if on_chunk:
+                    on_chunk(i, len(chunks), summary)
+
+    return summaries
+
+def summarize_chunks_with_deadline(summarizer, tokenizer, chunks, batch_size, length_floors, token_counts,
+                                   on_chunk, cancel, plan):
+    # Chunki idą od najistotniejszych, żeby przy braku czasu pomijane były te najmniej ważne
+    if token_counts is None:
+        token_counts = [count_tokens(tokenizer, ch) for ch in chunks]
+    salience = decoding.chunk_salience(chunks)
+    pending = sorted(range(len(chunks)), key=lambda i: -salience[i])
+    handles_batching = getattr(summarizer, "handles_batching", False)
+
+    def gen_kwargs_for(i):
+        return chunk_gen_kwargs(token_counts[i], length_floors, plan.profile, plan.length_scale)
+
+    def units(indices):
+        return sum(decoding.generation_units(gen_kwargs_for(i)) for i in indices)
+
+    summaries = [None] * len(chunks)
+    while pending:
+        check_cancelled(cancel)
+        pending = plan.fit(pending, units, salience)
+        batch, pending = sorted(pending[:batch_size], key=lambda i: len(chunks[i])), pending[batch_size:]
+
+        if handles_batching:
+            start = time.perf_counter()
+            out = summarizer([chunks[i] for i in batch], batch_size=len(batch), profile=plan.profile,
+                             length_scale=plan.length_scale)
+            plan.record(units(batch), time.perf_counter() - start)
+            results = zip(batch, [item["summary_text"] for item in out])
+        else:
+            # generate_batch sam zapisuje przepustowość każdej grupy
+            groups = {}
+            for i in batch:
+                gen_kwargs = gen_kwargs_for(i)
+                groups.setdefault((gen_kwargs["max_length"], gen_kwargs["min_length"]), (gen_kwargs, []))[1].append(i)
+            results = []
+            for gen_kwargs, group in groups.values():
+                results += zip(group, generate_batch(summarizer, tokenizer, chunks, group, gen_kwargs, token_counts))
+
+        if plan.is_degraded():
+            plan.degraded.update(batch)
+        for i, summary in results:
+            summaries[i] = summary
+            if on_chunk:
+                on_chunk(i, len(chunks), summary)
+
+    if enable_logs and (plan.downgrades or plan.dropped):
+        print(f"Termin: {plan.report()}")
+    return summaries
 
-        text = sanitize_text(raw_text)
-        summarizer, tokenizer = get_pipeline(model_name)
+def sanitize_text(text: str) -> str:
+    # Usuwa URL-e i e-maile, zwija powtórzone domeny, bigramy i słowa (liniowo, patrz normalizer.py)
+    return normalize(text)
+
+def generation_params(profile=None):
+    # Wszystko poza tekstem i modelem, od czego zależy wynik - zmiana któregoś z nich unieważnia cache
+    return {
+        "gen": chunk_gen_kwargs(0, profile=profile),
+        "profile": decoding.get_profile(profile),
+        "bucket": length_bucket_tokens,
+        "int8": quantization.cpu_fast_mode and get_device() == -1,
+        "chunk_tokens": [chunking.max_chunk_tokens, chunking.chunk_overlap_tokens, chunking.anchor_modulus,
+                         chunking.anchor_window, chunking.model_chunk_tokens],
+        "prefilter": textrank.settings(),
+    }
+
+def chunk_cache_key(model_name, chunk, profile=None):
+    return make_key("chunk", model_name, chunk, generation_params(profile))
+
+def document_cache_key(text, model_name, max_length, min_length, profile=None):
+    return make_key("document", model_name, text, max_length, min_length, generation_params(profile),
+                    ranking.mmr_lambda)
+
+def document_scope_key(model_name, max_length, min_length, profile=None):
+    # Prawie-duplikaty szukane są tylko wśród streszczeń zrobionych z tymi samymi ustawieniami
+    return make_key("document-scope", model_name, max_length, min_length, generation_params(profile),
+                    ranking.mmr_lambda)
+
+def cached_document_summary(text, model_name, max_length, min_length, profile=None):
+    if not use_cache:
+        return None
+    summary = get_cache().get_document(document_cache_key(text, model_name, max_length, min_length, profile))
+    if summary is None and dedup.enabled:
+        found = dedup.get_index().lookup(text, document_scope_key(model_name, max_length, min_length, profile),
+                                         resolve=get_cache().get_document)
+        if found:
+            similarity, _, summary = found
+            print(f"Prawie-duplikat streszczonego artykułu (podobieństwo {similarity:.2f})")
+    return summary
+
+def store_document_summary(text, model_name, max_length, min_length, summary, profile=None):
+    if use_cache:
+        key = document_cache_key(text, model_name, max_length, min_length, profile)
+        get_cache().put_document(key, summary)
+        if dedup.enabled:
+            dedup.get_index().add(text, document_scope_key(model_name, max_length, min_length, profile), key)
+
+def summarize_text_chunks(text, model_name: str, on_chunk=None, cancel=None, generate=None, profile=None, plan=None):
+    # generate: funkcja o sygnaturze summarize_chunks (np. wspólny harmonogram partii w server.py)
+    generate = generate or summarize_chunks
+    summarizer, tokenizer = get_pipeline(model_name)
+    if enable_logs:
+        print(f"Rejestr modeli: {registry.stats()}")
+
+    # Długie artykuły tracą tu zdania o najniższym wyniku TextRank, zanim trafią do chunkowania
+    text = textrank.prefilter(text)
+
+    prefix = ""
+    prefix_tokens = len(tokenizer.encode(prefix, add_special_tokens=False)) if prefix else 0
+
+    chunks, token_counts = [], []
+    with metrics.span("tokenize", chars=len(text)):
+        for ch, n_tokens in iter_chunks(text, tokenizer, model_name):
+            chunks.append(prefix + ch)
+            token_counts.append(n_tokens + prefix_tokens)
+
+    if not use_cache:
+        summaries = generate(summarizer, tokenizer, chunks, token_counts=token_counts, on_chunk=on_chunk,
+                             cancel=cancel, profile=profile, plan=plan)
+        return [summary for summary in summaries if summary is not None]
+
+    # Streszczamy tylko chunki, których nie ma w cache (np. niezmienione akapity zaktualizowanego artykułu)
+    keys = [chunk_cache_key(model_name, ch, profile) for ch in chunks]
+    summaries = get_cache().get_chunks(keys)
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    metrics.count("chunk_cache_hits", len(chunks) - len(missing))
+    metrics.count("chunk_cache_misses", len(missing))
+    if enable_logs:
+        print(f"Chunki z cache: {len(chunks) - len(missing)}/{len(chunks)}")
+    if on_chunk:
+        for i, summary in enumerate(summaries):
+            if summary is not None:
+                on_chunk(i, len(chunks), summary)
+
+    done = []
+    def collect(j, _, summary):
+        summaries[missing[j]] = summary
+        # Chunki streszczone obniżonym profilem (przez termin) nie trafiają do cache pod pełnym kluczem
+        if plan is None or j not in plan.degraded:
+            done.append(missing[j])
+        if on_chunk:
+            on_chunk(missing[j], len(chunks), summary)
 
-        chunks = []
-        while text:
-            if len(text) <= max_chunk_chars:
-                chunks.append(text)
-                break
-            split_pos = text.rfind("\n\n", 0, max_chunk_chars)
-            if split_pos <= 0:
-                split_pos = text.rfind(". ", 0, max_chunk_chars)
-            if split_pos <= 0:
-                split_pos = max_chunk_chars
-            chunk = text[:split_pos + 1] if split_pos < len(text) else text[:max_chunk_chars]
-            chunks.append(chunk.strip())
-            text = text[len(chunk):].strip()
+    try:
+        if missing:
+            generate(summarizer, tokenizer, [chunks[i] for i in missing],
+                     token_counts=[token_counts[i] for i in missing], on_chunk=collect, cancel=cancel,
+                     profile=profile, plan=plan)
+    finally:
+        # Także po przerwaniu zachowujemy już policzone chunki
+        if done:
+            get_cache().put_chunks([(keys[i], summaries[i]) for i in done])
+    return [summary for summary in summaries if summary is not None]
+
+def combine_summaries(summaries, max_length: int, min_length: int) -> str:
+    combined = " ".join(summaries)
+    combined_len = len(combined)
+
+    if enable_logs:
+        print(f"Długość po ETAPIE 1 (znaki): {combined_len}\n")
+        print(f"Liczba chunków: {len(summaries)}")
+        print(f"Podgląd:\n{combined[:300]}...\n")
+
+    if combined_len <= max_length:
+        result = combined.strip()
 
-        start_time = time.time()
-        prefix = ""
+    else:
+        result = select_summaries(summaries, max_length, min_length)
 
-        summaries = []
-        for ch in chunks:
-            input_tokens = count_tokens(tokenizer, prefix + ch)
+        if enable_logs:
+            print(f"Długość po ETAPIE 2 (MMR ranking) (znaki): {len(result)}\n")
 
-            max_len = max(60, int(input_tokens * 0.6))
-            min_len = max(40, int(input_tokens * 0.4))
+    with metrics.span("postprocess", chars=len(result)):
+        result = collapse_repeats(result)
+    return result
 
-            if min_len >= max_len:
-                min_len = max(30, max_len - 10)
+def get_summary(raw_text, model_name: str, max_length: int, min_length: int = 200, on_chunk=None, cancel=None,
+                profile=None, deadline_s=None, info=None) -> str:
+    """profile: nazwa profilu dekodowania (decoding.profiles). Z deadline_s generowanie dopasowuje się do
+    terminu (mniej wiązek, krótsze streszczenia, pominięcie mało istotnych chunków). Jeśli podano słownik
+    info, trafia do niego faktycznie użyty profil i lista obniżeń jakości."""
+    try:
+        plan = decoding.DeadlinePlan(model_name, deadline_s, profile) if deadline_s else None
+        if info is not None:
+            info.update({"profile_requested": profile or decoding.default_profile,
+                         "profile_used": profile or decoding.default_profile,
+                         "length_scale": 1.0, "downgrades": [], "dropped_chunks": 0, "cached": False})
 
-            gen_kwargs = {
-                "max_length": max_len,
-                "min_length": min_len,
-                "do_sample": False,
-                "num_beams": 4,
-                "no_repeat_ngram_size": 3,
-                "repetition_penalty": 1.1,
-            }
+        raw_text = (raw_text or "").strip()
+        if not raw_text:
+            return "Brak tekstu do streszczenia."
 
-            out = summarizer(prefix + ch, **gen_kwargs)
-            summaries.append(out[0]["summary_text"])
+        print("Długość tekstu wejściowego (znaki):", len(raw_text))
 
-        combined = " ".join(summaries)
-        combined_len = len(combined)
+        with metrics.span("sanitize", chars=len(raw_text)):
+            text = sanitize_text(raw_text)
 
+        start_time = time.time()
+        cached = cached_document_summary(text, model_name, max_length, min_length, profile)
+        metrics.count("document_cache_hits" if cached is not None else "document_cache_misses")
+        if cached is not None:
+            elapsed = time.time() - start_time
+            print(f"Streszczenie z cache ({elapsed:.3f} s)")
+            if info is not None:
+                info["cached"] = True
+            return cached, elapsed
+
+        summaries = summarize_text_chunks(text, model_name, on_chunk, cancel, profile=profile, plan=plan)
         elapsed = time.time() - start_time
 
-        if enable_logs:
-            print(f"Długość po ETAPIE 1 (znaki): {combined_len}\n")
-            print(f"Liczba chunków: {len(summaries)}")
-            print(f"Podgląd:\n{combined[:300]}...\n")
-
-        if combined_len <= max_length:
-            result = combined.strip()
-
+        result = combine_summaries(summaries, max_length, min_length)
+        if plan is not None and info is not None:
+            info.update(plan.report())
+        if plan is None or not (plan.downgrades or plan.dropped):
+            store_document_summary(text, model_name, max_length, min_length, result, profile)
         else:
-            embed_model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
-            chunk_embeddings = embed_model.encode(summaries, convert_to_tensor=True)
-            
-            final_chunks = []
-            selected_indices = set()
-            current_len = 0
-
-            # Centroid całego dokumentu
-            doc_embedding = torch.mean(chunk_embeddings, dim=0, keepdim=True)
-
-            # MMR loop
-            for _ in range(len(summaries)):
-                # Chunk z maksymalnym similarity do doc_embedding
-                scores = util.cos_sim(chunk_embeddings, doc_embedding).squeeze(1)
-                for idx in selected_indices:
-                    scores[idx] = -1
-                
-                best_idx = int(scores.argmax())
-                candidate = summaries[best_idx]
-                candidate_len = len(candidate)
-                remaining_space = max_length - current_len
-
-                if current_len + candidate_len > max_length:
-                    cut_pos = candidate.rfind('. ', 0, remaining_space)
-                    if cut_pos == -1:
-                        candidate = candidate[:remaining_space].rstrip()
-                    else:
-                        candidate = candidate[:cut_pos + 1].rstrip()
-                    final_chunks.append(candidate)
-                    current_len += len(candidate)
-                    break 
-                
-                final_chunks.append(candidate)
-                selected_indices.add(best_idx)
-                current_len += candidate_len
-
-                if current_len >= min_length:
-                    break
-
-                result = " ".join(final_chunks).strip()
-
-                print(f"Długość po ETAPIE 2 (MMR ranking) (znaki): {len(result)}\n")
-
-
-        result = re.sub(r'(\b\w+\b(?:\s+\b\w+\b))(?:\s+\1){2,}', r'\1', result)
-        result = re.sub(r'\b(\w+)(?:\s+\1){2,}', r'\1', result, flags=re.IGNORECASE)
+            print(f"Termin wymusił obniżenie jakości: {plan.report()}")
 
         print(f"Czas od chunkowania do końca funkcji: {elapsed:.2f} s")
 
         return result, elapsed
 
+    except SummaryCancelled:
+        raise
     except Exception as e:
-        return f"Nieznany błąd: {e}"
+        return f"Nieznany błąd: {e}"
\ No newline at end of file
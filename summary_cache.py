@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+cache_path = os.environ.get("SUMMARY_CACHE_PATH", os.path.join("cache", "summaries.sqlite"))
+max_cache_mb = int(os.environ.get("SUMMARY_CACHE_MB", "512"))
+evict_every = 100
+# Limit parametrów w jednym zapytaniu SQLite (starsze wersje: 999)
+_max_params = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    key TEXT PRIMARY KEY, summary TEXT NOT NULL, size INTEGER NOT NULL,
+    created REAL NOT NULL, last_access REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS documents_last_access ON documents (last_access);
+CREATE TABLE IF NOT EXISTS chunks (
+    key TEXT PRIMARY KEY, summary TEXT NOT NULL, size INTEGER NOT NULL,
+    created REAL NOT NULL, last_access REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS chunks_last_access ON chunks (last_access);
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+_TABLES = ("documents", "chunks")
+
+
+def make_key(*parts) -> str:
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SqliteStore:
+    """Baza SQLite w cache/ współdzielona przez wątki i procesy (cache streszczeń, indeks dedup).
+
+    Każdy wątek i proces ma własne połączenie; tryb WAL i busy_timeout pozwalają
+    wielu procesom roboczym czytać i pisać jednocześnie. Liczniki trzyma tabela stats.
+    """
+    schema = ""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connect().executescript(self.schema)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _bump(self, conn, name, amount=1):
+        conn.execute("INSERT INTO stats (name, value) VALUES (?, ?) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+
+class SummaryCache(SqliteStore):
+    """Trwały cache streszczeń w SQLite: całe dokumenty i pojedyncze chunki."""
+    schema = _SCHEMA
+
+    def __init__(self, path=None, max_bytes=None):
+        self.max_bytes = max_bytes if max_bytes is not None else max_cache_mb * 2**20
+        self._writes = 0
+        super().__init__(path or cache_path)
+
+    def _get_many(self, table, keys):
+        # Odczyt bez blokady zapisu (WAL); last_access i liczniki w jednej transakcji na wywołanie
+        if not keys:
+            return []
+        conn = self._connect()
+        unique = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(unique), _max_params):
+            part = unique[start:start + _max_params]
+            found.update(conn.execute(f"SELECT key, summary FROM {table} WHERE key IN ({','.join('?' * len(part))})",
+                                      part).fetchall())
+        hits = sum(key in found for key in keys)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if found:
+                now = time.time()
+                conn.executemany(f"UPDATE {table} SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+            if hits:
+                self._bump(conn, f"{table}_hits", hits)
+            if hits < len(keys):
+                self._bump(conn, f"{table}_misses", len(keys) - hits)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [found.get(key) for key in keys]
+
+    def _put(self, table, key, summary):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(f"INSERT OR REPLACE INTO {table} (key, summary, size, created, last_access) "
+                     "VALUES (?, ?, ?, ?, ?)", (key, summary, len(summary.encode("utf-8")) + len(key), now, now))
+        self._writes += 1
+        if self._writes % evict_every == 0:
+            self.evict()
+
+    def get_document(self, key):
+        return self._get_many("documents", [key])[0]
+
+    def put_document(self, key, summary):
+        self._put("documents", key, summary)
+
+    def get_chunks(self, keys):
+        return self._get_many("chunks", list(keys))
+
+    def put_chunks(self, items):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for key, summary in items:
+                self._put("chunks", key, summary)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def size_bytes(self):
+        conn = self._connect()
+        return sum(conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0] for table in _TABLES)
+
+    def evict(self):
+        # Usuwa najdawniej używane wpisy (z obu tabel) aż do zejścia poniżej limitu
+        conn = self._connect()
+        excess = self.size_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+        rows = conn.execute(
+            "SELECT 'documents', key, size, last_access FROM documents UNION ALL "
+            "SELECT 'chunks', key, size, last_access FROM chunks ORDER BY last_access").fetchall()
+        removed = 0
+        for table, key, size, _ in rows:
+            if excess <= 0:
+                break
+            conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+            excess -= size
+            removed += 1
+        self._bump(conn, "evictions", removed)
+        return removed
+
+    def stats(self):
+        conn = self._connect()
+        values = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        result = {"size_mb": self.size_bytes() / 2**20, "evictions": values.get("evictions", 0)}
+        for table in _TABLES:
+            hits, misses = values.get(f"{table}_hits", 0), values.get(f"{table}_misses", 0)
+            entries = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            result[table] = {"entries": entries, "hits": hits, "misses": misses,
+                             "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+        return result
+
+    def clear(self):
+        conn = self._connect()
+        for table in _TABLES + ("stats",):
+            conn.execute(f"DELETE FROM {table}")
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = SummaryCache()
+    return _default_cache
@@ -0,0 +1,164 @@
+"""Wstępny filtr ekstrakcyjny (TextRank) przed modelem abstrakcyjnym.
+
+Produkcyjna wersja prototypu z text_summary.ipynb: zdania to wektory lematów (morfeusz2, z cache),
+podobieństwo cosinusowe liczone jest na macierzy rzadkiej, a ranking zdań to PageRank metodą
+potęgową na macierzy przejść. Z długich artykułów usuwane są zdania o najniższym wyniku, więc
+do chunkowania i beam search trafia mniej tokenów.
+"""
+import os
+import re
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+import metrics
+
+enabled = os.environ.get("SUMMARY_PREFILTER", "1") != "0"
+# Krótsze teksty idą do modelu w całości
+prefilter_min_chars = int(os.environ.get("SUMMARY_PREFILTER_MIN_CHARS", "6000"))
+# Część znaków tekstu, która zostaje po filtrze
+keep_ratio = float(os.environ.get("SUMMARY_PREFILTER_KEEP", "0.6"))
+min_sentences = 8
+# Tytuł i lead zostają zawsze
+lead_sentences = 2
+damping = 0.85
+pagerank_tol = 1e-6
+pagerank_max_iter = 100
+lemma_cache_size = 50000
+
+stopwords = frozenset("""
+a aby ach acz aczkolwiek aj albo ale ależ ani aż bardziej bardzo bez bo bowiem by byli bym być był była
+było były będzie będą cali cała cały ci cię ciebie co cokolwiek coś czy czyli często daleko dla dlaczego
+dlatego do dobrze dokąd dość dużo dwa dwaj dwie dwoje dziś dzisiaj gdy gdyby gdyż gdzie gdziekolwiek
+gdzieś go i ich ile im inna inne inny innych iż ja jak jakaś jakby jaki jakichś jakie jakiś jakiż
+jakkolwiek jako jakoś je jeden jedna jedno jednak jednakże jego jej jemu jest jestem jeszcze jeśli
+jeżeli już ją każdy kiedy kilka kimś kto ktokolwiek ktoś która które którego której który których
+którym którzy ku lecz lub ma mają mało mam mi mimo między mną mnie mogą moi moim moja moje może
+możliwe można mój mu musi my na nad nam nami nas nasi nasz nasza nasze naszego naszych natomiast
+natychmiast nawet nią nic nich nie niech niego niej niemu nigdy nim nimi niż no o obok od około on ona
+one oni ono oraz oto owszem po pod podczas pomimo ponad ponieważ powinien powinna powinni
+powinno poza prawie przecież przed przede przedtem przez przy również sam sama są się skąd sobie
+sobą sposób swoje ta tak taka taki takie także tam te tego tej temu ten teraz też to tobą tobie toteż
+trzeba tu tutaj twoi twoim twoja twoje twym twój ty tych tylko tym u w wam wami was wasz wasza wasze
+we według wiele wielu więc więcej wszyscy wszystkich wszystkie wszystkim wszystko wtedy wy właśnie z
+za zapewne zawsze ze znowu znów został żaden żadna żadne żadnych że żeby
+""".split())
+
+_sentence_end_re = re.compile(r'[.!?…]["”»)]*(?=\s)')
+_word_re = re.compile(r'\w+')
+_morfeusz = None
+_morfeusz_lock = threading.Lock()
+
+
+def _get_morfeusz():
+    global _morfeusz
+    if _morfeusz is None:
+        try:
+            import morfeusz2
+        except ImportError:
+            _morfeusz = False
+        else:
+            _morfeusz = morfeusz2.Morfeusz()
+    return _morfeusz
+
+
+@lru_cache(maxsize=lemma_cache_size)
+def lemma(word):
+    """Lemat słowa (pisanego małymi literami) z morfeusz2; bez morfeusza zwraca samo słowo."""
+    with _morfeusz_lock:
+        morf = _get_morfeusz()
+        if not morf:
+            return word
+        analyses = morf.analyse(word)
+    for _, _, (orth, base, *_) in analyses:
+        if orth == word:
+            return base.split(":")[0].lower()
+    return word
+
+
+def split_sentences(text):
+    sentences, start = [], 0
+    for m in _sentence_end_re.finditer(text):
+        sentences.append(text[start:m.end()].strip())
+        start = m.end()
+    sentences.append(text[start:].strip())
+    return [s for s in sentences if s]
+
+
+def sentence_terms(sentence):
+    # Stopwords odrzucane przed i po lematyzacji ("była" -> "być")
+    lemmas = (lemma(w) for w in _word_re.findall(sentence.lower()) if w not in stopwords and not w.isdigit())
+    return [t for t in lemmas if t not in stopwords]
+
+
+def similarity_matrix(sentences):
+    """Macierz rzadka podobieństw cosinusowych worków lematów (bez przekątnej)."""
+    from scipy import sparse
+    vocabulary, rows, cols = {}, [], []
+    for i, sentence in enumerate(sentences):
+        for term in sentence_terms(sentence):
+            rows.append(i)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+    counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(sentences), len(vocabulary)))
+    counts.sum_duplicates()
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    vectors = sparse.diags(1.0 / norms) @ counts
+    similarity = (vectors @ vectors.T).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def pagerank(similarity):
+    """PageRank ważony podobieństwem; zdania bez połączeń rozdzielają swoją masę równomiernie."""
+    from scipy import sparse
+    n = similarity.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    out_weight[dangling] = 1.0
+    transition = (sparse.diags(1.0 / out_weight) @ similarity).T.tocsr()
+    scores = np.full(n, 1.0 / n)
+    for _ in range(pagerank_max_iter):
+        updated = damping * (transition @ scores + scores[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(updated - scores).sum() < pagerank_tol * n:
+            return updated
+        scores = updated
+    return scores
+
+
+def select_sentences(sentences, scores, ratio=None):
+    """Indeksy zdań (w kolejności dokumentu) o najwyższym wyniku, mieszczące się w ratio znaków."""
+    ratio = keep_ratio if ratio is None else ratio
+    budget = ratio * sum(len(s) for s in sentences)
+    keep = set(range(min(lead_sentences, len(sentences))))
+    used = sum(len(sentences[i]) for i in keep)
+    for i in np.argsort(-scores, kind="stable"):
+        if used >= budget:
+            break
+        if i not in keep:
+            keep.add(int(i))
+            used += len(sentences[i])
+    return sorted(keep)
+
+
+def prefilter(text, ratio=None):
+    """Usuwa z długiego tekstu zdania o najniższym wyniku TextRank; krótkie teksty zwraca bez zmian."""
+    if not enabled or len(text) < prefilter_min_chars:
+        return text
+    sentences = split_sentences(text)
+    if len(sentences) < min_sentences:
+        return text
+    with metrics.span("prefilter", sentences=len(sentences)):
+        scores = pagerank(similarity_matrix(sentences))
+        kept = select_sentences(sentences, scores, ratio)
+    metrics.count("prefilter_dropped_sentences", len(sentences) - len(kept))
+    return " ".join(sentences[i] for i in kept)
+
+
+def settings():
+    # Do kluczy cache: zmiana filtra zmienia tekst trafiający do modelu
+    return [enabled, prefilter_min_chars, keep_ratio, min_sentences, lead_sentences, damping]
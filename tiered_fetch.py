@@ -0,0 +1,198 @@
+"""Pobieranie warstwowe: najpierw statyczny HTML i profil strony, przeglądarka tylko gdy trzeba.
+
+Tekst z tieru statycznego jest oceniany (długość, udział zdań o cookies, logowaniu, "włącz
+JavaScript" itp.); słaby wynik eskaluje do Playwrighta. Wyniki per domena trafiają do
+cache/domain_tiers.json: domena, na której statyczne pobranie zawiodło browser_after_failures
+razy z rzędu, od razu idzie do przeglądarki, a co static_retry_every-te żądanie sprawdza,
+czy tier statyczny znów wystarcza.
+
+    python tiered_fetch.py              # udział tierów, łącznie i per domena
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import fetcher
+import metrics
+from scappers import playwright_scrapper, profiles
+
+stats_path = os.environ.get("SCRAPER_TIER_STATS", os.path.join("cache", "domain_tiers.json"))
+min_chars = 400
+max_boilerplate_ratio = 0.3
+browser_after_failures = 3
+static_retry_every = 20
+
+_boilerplate_re = re.compile(
+    r"cookie|ciasteczk|javascript|zaloguj|zarejestruj|subskrypc|prenumerat|newsletter|adblock"
+    r"|blokowanie reklam|polityk\w* prywatności|akceptuj|zgod\w* na przetwarzanie|dostęp\w* premium",
+    re.I)
+_sentence_re = re.compile(r"[^.!?\n]+[.!?]*")
+
+
+def boilerplate_ratio(text):
+    """Udział znaków w zdaniach wyglądających na elementy strony, a nie treść artykułu."""
+    if not text:
+        return 0.0
+    noise = sum(len(m.group()) for m in _sentence_re.finditer(text) if _boilerplate_re.search(m.group()))
+    return noise / len(text)
+
+
+def assess(text):
+    """Ocena tekstu z tieru statycznego: None gdy wystarcza, inaczej powód eskalacji."""
+    text = (text or "").strip()
+    if len(text) < min_chars:
+        return "short"
+    if boilerplate_ratio(text) > max_boilerplate_ratio:
+        return "boilerplate"
+    return None
+
+
+def domain_of(url):
+    host = urlsplit(url if "//" in url else "//" + url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def _new_entry():
+    return {"static_ok": 0, "static_failed": 0, "fail_streak": 0, "skipped_static": 0,
+            "browser_ok": 0, "browser_failed": 0, "served": {"static": 0, "browser": 0, "none": 0},
+            "updated_at": None}
+
+
+class DomainTiers:
+    """Statystyki tierów per domena, zapisywane atomowo po każdym żądaniu."""
+
+    def __init__(self, path=None):
+        self.path = path or stats_path
+        self._lock = threading.Lock()
+        self.domains = self._load()
+        self.session = {"static": 0, "browser": 0, "none": 0}
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.domains, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _entry(self, domain):
+        return self.domains.setdefault(domain, _new_entry())
+
+    def browser_first(self, domain):
+        with self._lock:
+            entry = self.domains.get(domain)
+            if not entry or entry["fail_streak"] < browser_after_failures:
+                return False
+            # Co static_retry_every-te żądanie próbuje statycznie; licznik rośnie także wtedy
+            entry["skipped_static"] += 1
+            return entry["skipped_static"] % static_retry_every != 0
+
+    def record(self, domain, tier, ok):
+        with self._lock:
+            entry = self._entry(domain)
+            entry[f"{tier}_{'ok' if ok else 'failed'}"] += 1
+            if tier == "static":
+                entry["fail_streak"] = 0 if ok else entry["fail_streak"] + 1
+
+    def served(self, domain, tier):
+        key = tier or "none"
+        with self._lock:
+            entry = self._entry(domain)
+            entry["served"][key] += 1
+            entry["updated_at"] = time.time()
+            self.session[key] += 1
+            self._save()
+        metrics.count(f"fetch_tier_{key}")
+
+    def shares(self, session=False):
+        """Udział żądań obsłużonych przez każdy tier (none: żaden tier nie dał dobrego tekstu)."""
+        with self._lock:
+            if session:
+                counts = dict(self.session)
+            else:
+                counts = {"static": 0, "browser": 0, "none": 0}
+                for entry in self.domains.values():
+                    for key, value in entry["served"].items():
+                        counts[key] += value
+        total = sum(counts.values())
+        return {key: value / total if total else 0.0 for key, value in counts.items()}, total
+
+    def report(self, session=False):
+        shares, total = self.shares(session)
+        return (f"statycznie {shares['static']:.0%}, przeglądarka {shares['browser']:.0%}, "
+                f"bez dobrego tekstu {shares['none']:.0%} (żądań: {total})")
+
+    def scrape(self, url):
+        domain = domain_of(url)
+        text = None
+        if self.browser_first(domain):
+            metrics.count("fetch_tier_static_skipped")
+        else:
+            with metrics.span("fetch_static", domain=domain):
+                content = fetcher.fetch(url)
+                text = profiles.extract_text(url, content) if content is not None else None
+            reason = assess(text)
+            self.record(domain, "static", reason is None)
+            if reason is None:
+                self.served(domain, "static")
+                return text
+            metrics.count(f"fetch_escalated_{reason}")
+
+        try:
+            with metrics.span("fetch_browser", domain=domain):
+                html = playwright_scrapper.fetch_article_html(url)
+                browser_text = profiles.extract_text(url, html)
+        except Exception as e:
+            print(f"Nie udało się pobrać {url} przez przeglądarkę: {e}")
+            browser_text = None
+        ok = bool(browser_text and browser_text.strip())
+        self.record(domain, "browser", ok)
+        if ok:
+            self.served(domain, "browser")
+            return browser_text
+        # Słaby tekst statyczny jest lepszy niż żaden, ale nie liczy się jako obsłużony
+        self.served(domain, None)
+        return text
+
+
+_default_tiers = None
+_default_lock = threading.Lock()
+
+
+def get_tiers():
+    global _default_tiers
+    with _default_lock:
+        if _default_tiers is None:
+            _default_tiers = DomainTiers()
+    return _default_tiers
+
+
+def scrape(url):
+    return get_tiers().scrape(url)
+
+
+def main(argv=None):
+    tiers_stats = DomainTiers(argv[0] if argv else None)
+    print(f"Łącznie: {tiers_stats.report()}")
+    rows = sorted(tiers_stats.domains.items(), key=lambda kv: -sum(kv[1]["served"].values()))
+    print(f"  {'domena':<32} {'żądań':>6} {'statycznie':>10} {'przegl.':>8} {'porażki stat.':>13}")
+    for domain, entry in rows:
+        total = sum(entry["served"].values()) or 1
+        mode = "  -> od razu przeglądarka" if entry["fail_streak"] >= browser_after_failures else ""
+        print(f"  {domain:<32} {total:6d} {entry['served']['static'] / total:10.0%} "
+              f"{entry['served']['browser'] / total:8.0%} {entry['static_failed']:13d}{mode}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,69 @@
+import threading
+
+import metrics
+
+max_batch_tokens = 4096
+length_ratio = 1.2
+
+
+def pack_batches(lengths, budget):
+    # Sortowanie po długości minimalizuje padding; partia mieści się w budżecie
+    # liczonym jako liczba_sekwencji * najdłuższa_sekwencja.
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches, batch = [], []
+    for i in order:
+        if batch and (len(batch) + 1) * lengths[i] > budget:
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class TranslationStage:
+    """Wsadowe tłumaczenie wielu tekstów naraz na współdzielonym modelu NLLB."""
+
+    def __init__(self, model, tokenizer, device=-1, batch_tokens=None):
+        import torch
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = torch.device(f"cuda:{device}") if device >= 0 else torch.device("cpu")
+        self.batch_tokens = batch_tokens or max_batch_tokens
+        self._lock = threading.Lock()
+
+    def encode(self, texts, src_lang):
+        with self._lock:
+            if hasattr(self.tokenizer, "src_lang"):
+                self.tokenizer.src_lang = src_lang
+            return self.tokenizer(list(texts), truncation=True)["input_ids"]
+
+    def translate_ids(self, input_ids, tgt_lang):
+        import torch
+        results = [""] * len(input_ids)
+        forced_bos = self.tokenizer.convert_tokens_to_ids(tgt_lang)
+        lengths = [len(ids) for ids in input_ids]
+
+        for batch in pack_batches(lengths, self.batch_tokens):
+            inputs = self.tokenizer.pad({"input_ids": [input_ids[i] for i in batch]}, return_tensors="pt")
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            with torch.inference_mode():
+                out = self.model.generate(
+                    **inputs,
+                    forced_bos_token_id=forced_bos,
+                    max_length=max(8, int(max(lengths[i] for i in batch) * length_ratio)),
+                )
+            decoded = self.tokenizer.batch_decode(out, skip_special_tokens=True)
+            for i, text in zip(batch, decoded):
+                results[i] = text
+
+        return results
+
+    def translate(self, texts, src_lang, tgt_lang):
+        texts = list(texts)
+        if not texts:
+            return []
+        with metrics.span("translate", src_lang=src_lang, tgt_lang=tgt_lang, texts=len(texts)):
+            input_ids = self.encode(texts, src_lang)
+            metrics.count("translate_input_tokens", sum(map(len, input_ids)))
+            return self.translate_ids(input_ids, tgt_lang)
@@ -0,0 +1,226 @@
+"""Streszczanie w kilku procesach ze wspólnymi wagami modeli.
+
+Wagi leżą raz na dysku jako safetensors w models/<nazwa>/ (tak zapisuje je load_model). Każdy
+proces mapuje ten plik do pamięci i buduje model na urządzeniu "meta", a potem podpina
+zmapowane tensory przez load_state_dict(assign=True), bez kopiowania. Strony pliku są więc
+w RAM-ie raz, wspólne dla wszystkich procesów, a start procesu roboczego to głównie import.
+
+    pool = WorkerPool(["airKlizz/mt5-base-wikinewssum-polish"], workers=4)
+    results = pool.summarize_many(texts, model_name, max_length=2000, min_length=1500)
+    summaries = summarizer.summarize_text_chunks(text, model_name, generate=pool.generator(model_name))
+
+Tryb int8 (SUMMARY_CPU_FAST) dotyczy tylko procesu głównego: spakowanych wag int8 nie da się
+mapować, więc procesy robocze zawsze liczą na wspólnych wagach fp32.
+"""
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain
+
+import quantization
+import summarizer
+
+models_dir = "models"
+default_workers = int(os.environ.get("SUMMARY_WORKERS", "0")) or max(1, (os.cpu_count() or 1) // 2)
+
+_safetensors_index = "model.safetensors.index.json"
+_safetensors_file = "model.safetensors"
+
+
+def model_dir(model_name):
+    return os.path.join(models_dir, model_name.replace("/", "_"))
+
+
+def weight_files(local_dir):
+    index_path = os.path.join(local_dir, _safetensors_index)
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            return sorted(set(json.load(f)["weight_map"].values()))
+    return [_safetensors_file] if os.path.exists(os.path.join(local_dir, _safetensors_file)) else []
+
+
+def ensure_safetensors(model_name):
+    """Katalog modelu z wagami w safetensors; przy pierwszym użyciu pobiera albo konwertuje model."""
+    local_dir = model_dir(model_name)
+    if not weight_files(local_dir):
+        model, tokenizer = summarizer.load_model(model_name, quantize=False)
+        if not weight_files(local_dir):
+            print(f"Zapisuję wagi {model_name} jako safetensors...")
+            model.save_pretrained(local_dir, safe_serialization=True)
+            tokenizer.save_pretrained(local_dir)
+    return local_dir
+
+
+def map_safetensors(path):
+    """Tensory z pliku safetensors jako widoki na mmap pliku, bez kopiowania danych.
+
+    Mapowanie jest prywatne (copy-on-write): plik nigdy się nie zmienia, a przypadkowy zapis
+    do wagi skopiowałby tylko tę jedną stronę w danym procesie, zamiast przerwać proces.
+    """
+    import torch
+    dtypes = {"F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+              "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+              "U8": torch.uint8, "BOOL": torch.bool}
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_len = struct.unpack("<Q", mapped[:8])[0]
+    header = json.loads(mapped[8:8 + header_len])
+    data_start = 8 + header_len
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = dtypes[info["dtype"]]
+        begin, end = info["data_offsets"]
+        count = (end - begin) // dtype.itemsize
+        if count:
+            tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + begin)
+        else:
+            tensor = torch.empty(0, dtype=dtype)
+        tensors[name] = tensor.view(info["shape"])
+    return tensors
+
+
+def load_shared(model_name):
+    """(model, tokenizer) z wagami zmapowanymi z models/<nazwa>/*.safetensors."""
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer, GenerationConfig
+    from transformers.integrations.accelerate import init_empty_weights
+    from transformers.modeling_utils import no_init_weights
+
+    local_dir = model_dir(model_name)
+    files = weight_files(local_dir)
+    if not files:
+        raise FileNotFoundError(f"Brak wag safetensors w {local_dir}")
+    state_dict = {}
+    for name in files:
+        state_dict.update(map_safetensors(os.path.join(local_dir, name)))
+
+    # Parametry powstają na "meta" (bez pamięci), bufory liczone w __init__ zostają na CPU
+    with no_init_weights(), init_empty_weights(include_buffers=False):
+        model = AutoModelForSeq2SeqLM.from_config(AutoConfig.from_pretrained(local_dir))
+    result = model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    still_meta = [name for name, t in chain(model.named_parameters(), model.named_buffers()) if t.is_meta]
+    if result.unexpected_keys or still_meta:
+        raise RuntimeError(f"Wagi w {local_dir} nie pasują do modelu: nadmiarowe {result.unexpected_keys[:5]}, "
+                           f"brakujące {still_meta[:5]}")
+    model.eval()
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(local_dir)
+    except OSError:
+        pass
+    return model, AutoTokenizer.from_pretrained(local_dir)
+
+
+def required_models(model_names):
+    names = list(dict.fromkeys(model_names))
+    if any(name not in summarizer.polish_models for name in names):
+        names.append(summarizer.translation_model_name)
+    return names
+
+
+def install_shared(model_names):
+    """Rejestruje w summarizer.registry modele ze wspólnymi wagami (także model tłumaczenia, jeśli trzeba)."""
+    for name in required_models(model_names):
+        if name not in summarizer.registry:
+            model, tokenizer = load_shared(name)
+            summarizer.registry.put(name, (model, tokenizer), summarizer.model_size_bytes(model))
+
+
+def _init_worker(model_names, threads, root, shared):
+    global models_dir
+    models_dir = root
+    quantization.cpu_threads = threads
+    quantization.configure_threads()
+    if shared:
+        install_shared(model_names)
+    else:
+        for name in model_names:
+            summarizer.get_model(name)
+
+
+def _worker_summary(text, model_name, max_length, min_length, profile):
+    return summarizer.get_summary(text, model_name, max_length, min_length, profile=profile)
+
+
+def _worker_chunks(model_name, chunks, token_counts, batch_size, length_floors, profile, length_scale):
+    pipe, tokenizer = summarizer.get_pipeline(model_name)
+    return summarizer.summarize_chunks(pipe, tokenizer, chunks, batch_size, length_floors, token_counts,
+                                       profile=profile, length_scale=length_scale)
+
+
+class WorkerPool:
+    """Pula procesów (spawn) streszczających całe dokumenty albo partie chunków.
+
+    shared=False ładuje modele w każdym procesie zwykłym load_model (dla porównania).
+    """
+
+    def __init__(self, model_names, workers=None, threads_per_worker=None, shared=True):
+        self.workers = workers or default_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.model_names = required_models(model_names)
+        for name in self.model_names:
+            ensure_safetensors(name)
+        self._executor = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker,
+            initargs=(self.model_names, self.threads_per_worker, models_dir, shared))
+
+    def warmup(self):
+        """Uruchamia wszystkie procesy i ładuje w nich modele; zwraca czas startu."""
+        start = time.perf_counter()
+        for future in [self._executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        return time.perf_counter() - start
+
+    def worker_pids(self):
+        return sorted(self._executor._processes)
+
+    def summarize_many(self, texts, model_name, max_length, min_length=200, profile=None):
+        """Jak get_summary dla każdego tekstu; dokumenty rozdzielane są między procesy."""
+        futures = [self._executor.submit(_worker_summary, text, model_name, max_length, min_length, profile)
+                   for text in texts]
+        return [future.result() for future in futures]
+
+    def generator(self, model_name):
+        """Funkcja o sygnaturze summarize_chunks, która rozsyła partie chunków do procesów.
+
+        Do użycia jako generate= w summarize_text_chunks. Plan terminu (deadline) potrzebuje
+        pomiarów z każdej partii po kolei, więc z planem chunki liczone są lokalnie.
+        """
+        def generate(pipe, tokenizer, chunks, batch_size=None, length_floors=(60, 40), token_counts=None,
+                     on_chunk=None, cancel=None, profile=None, length_scale=1.0, plan=None):
+            if plan is not None:
+                return summarizer.summarize_chunks(pipe, tokenizer, chunks, batch_size, length_floors, token_counts,
+                                                   on_chunk, cancel, profile, length_scale, plan)
+            batch_size = batch_size or summarizer.summary_batch_size
+            if token_counts is None:
+                token_counts = [summarizer.count_tokens(tokenizer, ch) for ch in chunks]
+            # Chunki o podobnej długości w jednej partii, jak w summarize_chunks
+            order = sorted(range(len(chunks)), key=lambda i: token_counts[i])
+            batches = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+            pending = {self._executor.submit(_worker_chunks, model_name, [chunks[i] for i in batch],
+                                             [token_counts[i] for i in batch], batch_size, length_floors,
+                                             profile, length_scale): batch
+                       for batch in batches}
+            summaries = [None] * len(chunks)
+            try:
+                while pending:
+                    summarizer.check_cancelled(cancel)
+                    done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for i, summary in zip(pending.pop(future), future.result()):
+                            summaries[i] = summary
+                            if on_chunk:
+                                on_chunk(i, len(chunks), summary)
+            finally:
+                for future in pending:
+                    future.cancel()
+            return summaries
+        return generate
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)